@@ -7,5 +7,12 @@ from .list import (
     list_versions,
     Verbosity,
 )
-from .download import download
-from .publish import publish
\ No newline at end of file
+from .download import download, DEFAULT_DOWNLOAD_JOBS
+from .publish import publish
+from .plan import (
+    plan_publish,
+    apply_plan,
+    print_plan,
+    read_plan_file,
+    write_plan_file,
+)
\ No newline at end of file
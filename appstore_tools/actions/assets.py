@@ -0,0 +1,167 @@
+import os
+import re
+import types
+from typing import NamedTuple, Mapping, FrozenSet, Optional, Pattern
+
+from .util import read_txt_file, PARTIAL_FILE_EXT
+
+ATTRIBUTES_FILE_EXT = ".json"
+TEXT_FILE_EXT = ".txt"
+
+# The asset directory of an app is laid out as:
+#   <app dir>/<locale>/<key>.txt                                  text attributes
+#   <app dir>/<locale>/screenshots/<display type>/<file>          screenshots
+#   <app dir>/<locale>/previews/<preview type>/<file>             previews
+#   <app dir>/<locale>/previews/<preview type>/<file>.json        preview attributes
+# Unfinished downloads (<file>.<checksum>.part) in the set directories aren't assets.
+# `scan_assets` walks it once, and every publish stage reads the resulting index.
+
+
+class AssetFile(NamedTuple):
+    """A screenshot/preview file, with the stat taken when it was indexed."""
+
+    name: str
+    path: str
+    stat: os.stat_result
+
+
+class MediaSetAssets(NamedTuple):
+    """The files in a screenshot/preview set directory."""
+
+    name: str
+    path: str
+    # Media files by name, in name order. Ignored files are included, see `ignored`.
+    files: Mapping[str, AssetFile]
+    # Attributes file contents, by media file name. Ignored files are left out.
+    attributes: Mapping[str, str]
+    # Paths matching the asset ignore pattern
+    ignored: FrozenSet[str]
+
+
+class LocaleAssets(NamedTuple):
+    """The text attributes and media sets in a locale directory."""
+
+    locale: str
+    path: str
+    # Text attribute file contents, by key. Ignored files are left out.
+    texts: Mapping[str, str]
+    # Paths matching the asset ignore pattern
+    ignored: FrozenSet[str]
+    # Sets by display/preview type, or None without a screenshots/previews directory
+    screenshot_sets: Optional[
+        Mapping[str, MediaSetAssets]
+    ]  # pylint: disable=unsubscriptable-object
+    preview_sets: Optional[
+        Mapping[str, MediaSetAssets]
+    ]  # pylint: disable=unsubscriptable-object
+
+
+class AssetIndex(NamedTuple):
+    """The locales in an app directory."""
+
+    path: str
+    locales: Mapping[str, LocaleAssets]
+
+
+def compile_asset_ignore(
+    asset_ignore: Optional[str],  # pylint: disable=unsubscriptable-object
+) -> Optional[Pattern]:  # pylint: disable=unsubscriptable-object
+    return re.compile(asset_ignore) if asset_ignore else None
+
+
+def _scan_dir(path: str) -> list:
+    """List a directory's entries in name order. The entries cache their file type."""
+    with os.scandir(path) as entries:
+        return sorted(entries, key=lambda x: x.name)
+
+
+def _is_ignored(
+    ignore: Optional[Pattern], path: str  # pylint: disable=unsubscriptable-object
+) -> bool:
+    return ignore is not None and ignore.search(path) is not None
+
+
+def scan_media_set(
+    path: str,
+    ignore: Optional[Pattern] = None,  # pylint: disable=unsubscriptable-object
+) -> MediaSetAssets:
+    files = {}
+    attributes = {}
+    ignored = set()
+    for entry in _scan_dir(path):
+        if not entry.is_file() or entry.name.endswith(PARTIAL_FILE_EXT):
+            continue
+        if _is_ignored(ignore, entry.path):
+            ignored.add(entry.path)
+        if entry.name.endswith(ATTRIBUTES_FILE_EXT):
+            if entry.path not in ignored:
+                media_file_name = entry.name[: -len(ATTRIBUTES_FILE_EXT)]
+                attributes[media_file_name] = read_txt_file(entry.path)
+        else:
+            files[entry.name] = AssetFile(
+                name=entry.name, path=entry.path, stat=entry.stat()
+            )
+    return MediaSetAssets(
+        name=os.path.basename(path),
+        path=path,
+        files=types.MappingProxyType(files),
+        attributes=types.MappingProxyType(attributes),
+        ignored=frozenset(ignored),
+    )
+
+
+def scan_media_sets(
+    path: str,
+    ignore: Optional[Pattern] = None,  # pylint: disable=unsubscriptable-object
+) -> Mapping[str, MediaSetAssets]:
+    """Scan the set directories (named by display/preview type) in a media directory."""
+    return types.MappingProxyType(
+        {x.name: scan_media_set(x.path, ignore) for x in _scan_dir(path) if x.is_dir()}
+    )
+
+
+def scan_locale(
+    path: str,
+    ignore: Optional[Pattern] = None,  # pylint: disable=unsubscriptable-object
+) -> LocaleAssets:
+    texts = {}
+    ignored = set()
+    screenshot_sets = None
+    preview_sets = None
+    for entry in _scan_dir(path):
+        if entry.is_dir():
+            if entry.name == "screenshots":
+                screenshot_sets = scan_media_sets(entry.path, ignore)
+            elif entry.name == "previews":
+                preview_sets = scan_media_sets(entry.path, ignore)
+        elif entry.is_file() and entry.name.endswith(TEXT_FILE_EXT):
+            if _is_ignored(ignore, entry.path):
+                ignored.add(entry.path)
+            else:
+                texts[entry.name[: -len(TEXT_FILE_EXT)]] = read_txt_file(entry.path)
+    return LocaleAssets(
+        locale=os.path.basename(path),
+        path=path,
+        texts=types.MappingProxyType(texts),
+        ignored=frozenset(ignored),
+        screenshot_sets=screenshot_sets,
+        preview_sets=preview_sets,
+    )
+
+
+def scan_assets(
+    app_dir: str,
+    asset_ignore: Optional[str] = "",  # pylint: disable=unsubscriptable-object
+) -> AssetIndex:
+    """Index an app's asset directory in a single walk, applying the asset ignore pattern."""
+    ignore = compile_asset_ignore(asset_ignore)
+    return AssetIndex(
+        path=app_dir,
+        locales=types.MappingProxyType(
+            {
+                x.name: scan_locale(x.path, ignore)
+                for x in _scan_dir(app_dir)
+                if x.is_dir()
+            }
+        ),
+    )
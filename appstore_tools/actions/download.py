@@ -1,15 +1,29 @@
 import colorama
 import os
+import re
+import hashlib
+import requests
+import shutil
+import functools
+import threading
+from typing import Any, Callable, Optional, Mapping, Collection, Sequence
 from appstore_tools import appstore
+from appstore_tools.cache_util import read_json_cache, write_json_cache
 from appstore_tools.print_util import print_clr, clr, json_file
 from appstore_tools.tqdm_util import tqdm_with_redirect
 from appstore_tools.appstore.auth import AccessToken
+from .media_names import get_local_file_name
 from .util import (
     get_attributes_file_path,
-    write_txt_file,
-    write_binary_file,
-    fetch_screenshot,
-    fetch_preview,
+    get_partial_file_path,
+    update_file_hash,
+    cache_file_checksum,
+    update_txt_file,
+    file_checksum,
+    save_checksum_cache,
+    get_screenshot_url,
+    get_preview_url,
+    run_concurrently,
     print_info_status,
     print_version_status,
     print_locale_status,
@@ -17,6 +31,262 @@ from .util import (
     print_media_status,
 )
 
+DEFAULT_DOWNLOAD_JOBS = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOADS_CACHE_NAME = "downloads.json"
+
+# The downloads record maps each downloaded file, by absolute path, to the source it came from:
+#   {"/path/to/en-US/screenshots/APP_IPHONE_65/1.png": {
+#       "sourceFileChecksum": "<md5 of the uploaded file>", "checksum": "<md5 of the download>"}}
+# Screenshots download re-encoded from their image template, so unlike previews, they never
+# match the source checksum: the record is how a sync knows they are already up to date.
+
+_downloads = None
+_downloads_lock = threading.Lock()
+
+
+def _load_downloads() -> dict:
+    global _downloads
+    if _downloads is None:
+        _downloads = read_json_cache(DOWNLOADS_CACHE_NAME)
+    return _downloads
+
+
+def save_downloads() -> None:
+    """Persist the downloads recorded by `record_download` for future syncs."""
+    with _downloads_lock:
+        if _downloads is not None:
+            write_json_cache(DOWNLOADS_CACHE_NAME, _downloads)
+
+
+def record_download(media: dict, path: str, checksum: str) -> None:
+    """Record the source and md5 of a downloaded screenshot/preview file."""
+    entry = {
+        "sourceFileChecksum": media["attributes"]["sourceFileChecksum"],
+        "checksum": checksum,
+    }
+    with _downloads_lock:
+        _load_downloads()[os.path.abspath(path)] = entry
+
+
+def local_media_matches(media: dict, path: str) -> bool:
+    """Test whether a local file already has the content of a screenshot/preview.
+
+    The file matches if it is the uploaded source file (same size and md5), or if it
+    was downloaded from the same source file and hasn't changed since."""
+    source_checksum = media["attributes"]["sourceFileChecksum"]
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if source_checksum is None:
+        return False
+
+    if stat.st_size == media["attributes"]["fileSize"]:
+        if file_checksum(path, stat) == source_checksum:
+            return True
+
+    with _downloads_lock:
+        entry = _load_downloads().get(os.path.abspath(path))
+    return (
+        entry is not None
+        and entry["sourceFileChecksum"] == source_checksum
+        and entry["checksum"] == file_checksum(path, stat)
+    )
+
+
+def get_content_range_start(
+    response: requests.Response,
+) -> Optional[int]:  # pylint: disable=unsubscriptable-object
+    """Gets the first byte offset of a partial content response."""
+    match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match is not None else None
+
+
+def stream_to_partial_file(
+    url: str, partial_path: str, on_progress: Callable[[int], None], file_hash: Any
+) -> Optional[bool]:  # pylint: disable=unsubscriptable-object
+    """Stream a download to a partial file in chunks, so only one chunk is held in memory.
+    An existing partial file is resumed with a range request.
+    The whole file is fed to `file_hash`, a new hash, as it's written.
+
+    Returns:
+        bool: True if the partial file is complete, False if the download failed,
+            or None if the existing partial file can't be resumed
+    """
+    offset = os.path.getsize(partial_path) if os.path.isfile(partial_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset > 0 else None
+
+    with appstore.get_session().get(url, stream=True, headers=headers) as response:
+        if response.status_code == 206:
+            if get_content_range_start(response) != offset:
+                return None
+            mode = "ab"
+            update_file_hash(file_hash, partial_path)
+            on_progress(offset)
+        elif response.status_code == 416:
+            return None
+        elif response.ok:
+            # Without range support, the whole file is sent again
+            mode = "wb"
+            offset = 0
+        else:
+            return False
+
+        content_length = response.headers.get("Content-Length")
+        written = 0
+        with open(file=partial_path, mode=mode) as file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+                file_hash.update(chunk)
+                written += len(chunk)
+                on_progress(len(chunk))
+
+    return content_length is None or written == int(content_length)
+
+
+def download_media_file(
+    url: str,
+    path: str,
+    on_progress: Callable[[int], None],
+    file_size: Optional[int] = None,  # pylint: disable=unsubscriptable-object
+    source_checksum: Optional[str] = None,  # pylint: disable=unsubscriptable-object
+) -> Optional[str]:  # pylint: disable=unsubscriptable-object
+    """Download a screenshot/preview to a partial file, and rename it to the path once complete,
+    so an interrupted download never leaves a truncated file behind. The next download
+    of the same source resumes the partial file.
+
+    The md5 is computed as the file is written, and seeds the checksum cache.
+    A download the size of the uploaded source file must match its checksum. Screenshots
+    download re-encoded from their image template, so only previews are verified.
+
+    Returns:
+        str: the md5 of the downloaded file, or None if the download failed
+    """
+    partial_path = get_partial_file_path(path, source_checksum)
+    try:
+        file_hash = hashlib.md5()
+        complete = stream_to_partial_file(url, partial_path, on_progress, file_hash)
+        if complete is None:
+            os.remove(partial_path)
+            file_hash = hashlib.md5()
+            complete = stream_to_partial_file(url, partial_path, on_progress, file_hash)
+    except requests.exceptions.RequestException:
+        # Keep the partial file to resume
+        return None
+    if not complete:
+        return None
+
+    checksum = file_hash.hexdigest()
+    stat = os.stat(partial_path)
+    if (
+        source_checksum is not None
+        and stat.st_size == file_size
+        and checksum != source_checksum
+    ):
+        os.remove(partial_path)
+        return None
+
+    # A rename keeps the inode and modification time, so the stat still fingerprints the file
+    os.replace(partial_path, path)
+    cache_file_checksum(path, checksum, stat)
+    return checksum
+
+
+def download_media(
+    media: dict,
+    url: Optional[str],  # pylint: disable=unsubscriptable-object
+    path: str,
+    label: str,
+    on_progress: Callable[[int], None],
+    attributes: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+    sync: bool = False,
+):
+    """Download a screenshot/preview, and write its attributes file if given.
+    Progress is reported per chunk, and made up to the media's file size at the end.
+    With `sync`, a local file that already matches the media isn't downloaded again."""
+    file_size = media["attributes"]["fileSize"]
+    downloaded = 0
+
+    def on_chunk(size: int) -> None:
+        nonlocal downloaded
+        downloaded += size
+        on_progress(size)
+
+    found = False
+    if sync and local_media_matches(media, path):
+        print_media_status(label, colorama.Fore.CYAN, "unchanged")
+        found = True
+    elif url is None:
+        print_media_status(label, colorama.Fore.RED, "no asset (in processing)")
+    else:
+        checksum = download_media_file(
+            url=url,
+            path=path,
+            on_progress=on_chunk,
+            file_size=file_size,
+            source_checksum=media["attributes"]["sourceFileChecksum"],
+        )
+        if checksum is not None:
+            print_media_status(label, colorama.Fore.CYAN, "written to disk")
+            record_download(media, path, checksum)
+            found = True
+        else:
+            print_media_status(label, colorama.Fore.RED, "download failed")
+
+    if found and attributes is not None:
+        update_txt_file(
+            path=get_attributes_file_path(path),
+            content=json_file(attributes),
+        )
+
+    if downloaded < file_size:
+        on_progress(file_size - downloaded)
+
+
+def prune_media_sets(
+    media_dir: str, locale: str, media_sets: Mapping[str, Collection[str]]
+) -> None:
+    """Delete the set directories and files in a screenshots/previews directory
+    that the appstore no longer has.
+
+    Args:
+        media_sets: the file names to keep, by display/preview type
+    """
+    with os.scandir(media_dir) as entries:
+        set_entries = sorted((x for x in entries if x.is_dir()), key=lambda x: x.name)
+
+    for set_entry in set_entries:
+        file_names = media_sets.get(set_entry.name)
+        if file_names is None:
+            print_media_set_status(set_entry.name, colorama.Fore.RED, "pruning set")
+            shutil.rmtree(set_entry.path)
+            continue
+
+        with os.scandir(set_entry.path) as entries:
+            stale = sorted(
+                x.name for x in entries if x.is_file() and x.name not in file_names
+            )
+        for file_name in stale:
+            print_media_status(
+                os.path.join(locale, set_entry.name, file_name),
+                colorama.Fore.RED,
+                "pruned",
+            )
+            os.remove(os.path.join(set_entry.path, file_name))
+
+
+def check_media_order(set_name: str, media: Sequence[dict]) -> None:
+    """Warn when the file names of a set's media don't sort in the appstore order.
+    Publishing the downloaded set would then reorder it to the file name order."""
+    file_names = [get_local_file_name(x) for x in media]
+    if file_names != sorted(file_names):
+        print_media_set_status(
+            set_name,
+            colorama.Fore.YELLOW,
+            "file names don't sort in the appstore order, publishing would reorder them",
+        )
+
 
 def download_version(
     access_token: AccessToken,
@@ -25,13 +295,21 @@ def download_version(
     bundle_id: str,
     platforms: appstore.PlatformList,
     version_states: appstore.VersionStateList = tuple(appstore.VersionState),
+    jobs: int = DEFAULT_DOWNLOAD_JOBS,
+    sync: bool = False,
+    prune: bool = False,
 ):
-    """Download the app version localized strings and media (screenshots/previews) to the app directory."""
+    """Download the app version localized strings and media (screenshots/previews) to the app directory.
+    Up to `jobs` media files are downloaded concurrently.
+
+    With `sync`, only the media missing or changed locally are downloaded.
+    With `prune`, local media and sets the appstore no longer has are deleted."""
     versions = appstore.get_versions(
         app_id=app_id,
         access_token=access_token,
         platforms=platforms,
         states=version_states,
+        fields=["platform", "appStoreState"],
     )
     if len(versions) == 0:
         message = f"No app version found: {colorama.Fore.CYAN}{platforms}{colorama.Fore.RESET}"
@@ -51,139 +329,158 @@ def download_version(
     )
 
     # Build a full list of needed assets
-    localizations = appstore.get_version_localizations(
+    localizations = appstore.get_version_media_tree(
         version_id=version_id, access_token=access_token
     )
     asset_total = 0
     asset_size_total = 0
     for loc in localizations:
-        loc["screenshotSets"] = appstore.get_screenshot_sets(
-            localization_id=loc["id"], access_token=access_token
-        )
         for screenshot_set in loc["screenshotSets"]:
-            screenshots = appstore.get_screenshots(
-                screenshot_set_id=screenshot_set["id"], access_token=access_token
-            )
+            screenshots = screenshot_set["screenshots"]
             asset_total += len(screenshots)
             asset_size_total += sum(x["attributes"]["fileSize"] for x in screenshots)
-            screenshot_set["screenshots"] = screenshots
 
-        loc["previewSets"] = appstore.get_preview_sets(
-            localization_id=loc["id"], access_token=access_token
-        )
         for preview_set in loc["previewSets"]:
-            previews = appstore.get_previews(
-                preview_set_id=preview_set["id"], access_token=access_token
-            )
+            previews = preview_set["previews"]
             asset_total += len(previews)
             asset_size_total += sum(x["attributes"]["fileSize"] for x in previews)
-            preview_set["previews"] = previews
-
-    # Download/Write all the assets
-    with tqdm_with_redirect(
-        total=asset_size_total, unit="B", unit_scale=True, colour="green", leave=False
-    ) as progress_bar:
-        for loc in localizations:
-            loc_attr = loc["attributes"]
-            locale = loc_attr["locale"]
-            loc_dir = os.path.join(app_dir, locale)
-            screenshots_dir = os.path.join(loc_dir, "screenshots")
-            previews_dir = os.path.join(loc_dir, "previews")
-
-            print_locale_status(
-                locale, colorama.Fore.CYAN, "downloading version locale"
-            )
 
-            # Locale directories
-            os.makedirs(name=loc_dir, exist_ok=True)
-            os.makedirs(name=screenshots_dir, exist_ok=True)
-            os.makedirs(name=previews_dir, exist_ok=True)
-
-            for key in appstore.VersionLocalizationAttributes.__annotations__.keys():
-                content = loc_attr[key] if loc_attr[key] is not None else ""
-                write_txt_file(
-                    path=os.path.join(loc_dir, key + ".txt"),
-                    content=content,
-                )
+    # Write the text attributes, and list the media to download
+    tasks = []
+    for loc in localizations:
+        loc_attr = loc["attributes"]
+        locale = loc_attr["locale"]
+        loc_dir = os.path.join(app_dir, locale)
+        screenshots_dir = os.path.join(loc_dir, "screenshots")
+        previews_dir = os.path.join(loc_dir, "previews")
 
-            for screenshot_set in loc["screenshotSets"]:
-                display_type = screenshot_set["attributes"]["screenshotDisplayType"]
-                screenshot_set_dir = os.path.join(screenshots_dir, display_type)
+        print_locale_status(locale, colorama.Fore.CYAN, "downloading version locale")
 
-                # Screenshot Set directory
-                print_media_set_status(
-                    display_type, colorama.Fore.CYAN, "downloading screenshot set"
-                )
-                os.makedirs(name=screenshot_set_dir, exist_ok=True)
+        # Locale directories
+        os.makedirs(name=loc_dir, exist_ok=True)
+        os.makedirs(name=screenshots_dir, exist_ok=True)
+        os.makedirs(name=previews_dir, exist_ok=True)
 
-                for screenshot in screenshot_set["screenshots"]:
-                    file_name = screenshot["attributes"]["fileName"]
-                    file_size = screenshot["attributes"]["fileSize"]
-                    file_path = os.path.join(screenshot_set_dir, file_name)
+        for key in appstore.VersionLocalizationAttributes.__annotations__.keys():
+            content = loc_attr[key] if loc_attr[key] is not None else ""
+            update_txt_file(
+                path=os.path.join(loc_dir, key + ".txt"),
+                content=content,
+            )
 
-                    response = fetch_screenshot(screenshot)
-                    if response is None:
-                        print_media_status(
-                            file_name, colorama.Fore.RED, "no asset (in processing)"
-                        )
-                    elif response.ok:
-                        print_media_status(
-                            file_name, colorama.Fore.CYAN, "writing to disk"
-                        )
-                        write_binary_file(
-                            path=file_path,
-                            content=response.content,
+        if prune:
+            prune_media_sets(
+                media_dir=screenshots_dir,
+                locale=locale,
+                media_sets={
+                    x["attributes"]["screenshotDisplayType"]: {
+                        name
+                        for y in x["screenshots"]
+                        for name in (
+                            get_local_file_name(y),
+                            get_partial_file_path(
+                                get_local_file_name(y),
+                                y["attributes"]["sourceFileChecksum"],
+                            ),
                         )
-                    else:
-                        print_media_status(
-                            file_name, colorama.Fore.RED, "download failed"
+                    }
+                    for x in loc["screenshotSets"]
+                },
+            )
+            prune_media_sets(
+                media_dir=previews_dir,
+                locale=locale,
+                media_sets={
+                    x["attributes"]["previewType"]: {
+                        name
+                        for y in x["previews"]
+                        for name in (
+                            get_local_file_name(y),
+                            get_attributes_file_path(get_local_file_name(y)),
+                            get_partial_file_path(
+                                get_local_file_name(y),
+                                y["attributes"]["sourceFileChecksum"],
+                            ),
                         )
-                    progress_bar.update(file_size)
+                    }
+                    for x in loc["previewSets"]
+                },
+            )
 
-            for preview_set in loc["previewSets"]:
-                preview_type = preview_set["attributes"]["previewType"]
-                preview_set_dir = os.path.join(previews_dir, preview_type)
+        for screenshot_set in loc["screenshotSets"]:
+            display_type = screenshot_set["attributes"]["screenshotDisplayType"]
+            screenshot_set_dir = os.path.join(screenshots_dir, display_type)
 
-                # Preview Set directory
-                print_media_set_status(
-                    preview_type, colorama.Fore.CYAN, "downloading preview set"
+            # Screenshot Set directory
+            print_media_set_status(
+                display_type, colorama.Fore.CYAN, "downloading screenshot set"
+            )
+            os.makedirs(name=screenshot_set_dir, exist_ok=True)
+            check_media_order(display_type, screenshot_set["screenshots"])
+
+            for screenshot in screenshot_set["screenshots"]:
+                file_name = get_local_file_name(screenshot)
+                tasks.append(
+                    functools.partial(
+                        download_media,
+                        media=screenshot,
+                        url=get_screenshot_url(screenshot),
+                        path=os.path.join(screenshot_set_dir, file_name),
+                        label=os.path.join(locale, display_type, file_name),
+                        sync=sync,
+                    )
                 )
-                os.makedirs(name=preview_set_dir, exist_ok=True)
-
-                for preview in preview_set["previews"]:
-                    file_name = preview["attributes"]["fileName"]
-                    file_path = os.path.join(preview_set_dir, file_name)
-
-                    response = fetch_preview(preview)
-                    if response is None:
-                        print_media_status(
-                            file_name,
-                            colorama.Fore.RED,
-                            "no asset (in processing)",
-                        )
-                    elif response.ok:
-                        print_media_status(
-                            file_name, colorama.Fore.CYAN, "writing to disk"
-                        )
-                        write_binary_file(
-                            path=file_path,
-                            content=response.content,
-                        )
-                        write_txt_file(
-                            path=get_attributes_file_path(file_path),
-                            content=json_file(
-                                {
-                                    "previewFrameTimeCode": preview["attributes"][
-                                        "previewFrameTimeCode"
-                                    ]
-                                }
-                            ),
-                        )
-                    else:
-                        print_media_status(
-                            file_name, colorama.Fore.RED, "download failed"
-                        )
-                    progress_bar.update(file_size)
+
+        for preview_set in loc["previewSets"]:
+            preview_type = preview_set["attributes"]["previewType"]
+            preview_set_dir = os.path.join(previews_dir, preview_type)
+
+            # Preview Set directory
+            print_media_set_status(
+                preview_type, colorama.Fore.CYAN, "downloading preview set"
+            )
+            os.makedirs(name=preview_set_dir, exist_ok=True)
+            check_media_order(preview_type, preview_set["previews"])
+
+            for preview in preview_set["previews"]:
+                file_name = get_local_file_name(preview)
+                tasks.append(
+                    functools.partial(
+                        download_media,
+                        media=preview,
+                        url=get_preview_url(preview),
+                        path=os.path.join(preview_set_dir, file_name),
+                        label=os.path.join(locale, preview_type, file_name),
+                        attributes={
+                            "previewFrameTimeCode": preview["attributes"][
+                                "previewFrameTimeCode"
+                            ]
+                        },
+                        sync=sync,
+                    )
+                )
+
+    # Download the media with up to `jobs` workers, streaming each file to disk
+    with tqdm_with_redirect(
+        total=asset_size_total, unit="B", unit_scale=True, colour="green", leave=False
+    ) as progress_bar:
+        progress_lock = threading.Lock()
+
+        def update_progress(size: int) -> None:
+            with progress_lock:
+                progress_bar.update(size)
+
+        try:
+            run_concurrently(
+                tasks=[
+                    functools.partial(task, on_progress=update_progress)
+                    for task in tasks
+                ],
+                jobs=jobs,
+            )
+        finally:
+            save_downloads()
+            save_checksum_cache()
 
 
 def download_info(
@@ -198,6 +495,7 @@ def download_info(
         app_id=app_id,
         access_token=access_token,
         states=version_states,
+        fields=["appStoreState"],
     )
     if len(infos) == 0:
         message = f"No app infos found"
@@ -228,7 +526,7 @@ def download_info(
 
         for key in appstore.InfoLocalizationAttributes.__annotations__.keys():
             content = loc_attr[key] if loc_attr[key] is not None else ""
-            write_txt_file(
+            update_txt_file(
                 path=os.path.join(loc_dir, key + ".txt"),
                 content=content,
             )
@@ -242,8 +540,15 @@ def download(
     platforms: appstore.PlatformList,
     version_states: appstore.VersionStateList = tuple(appstore.VersionState),
     overwrite: bool = False,
+    jobs: int = DEFAULT_DOWNLOAD_JOBS,
+    sync: bool = False,
+    prune: bool = False,
 ):
-    """Download all the app meta data to the local app directory."""
+    """Download all the app meta data to the local app directory.
+    Up to `jobs` media files are downloaded concurrently.
+
+    With `sync`, an existing app directory is brought up to date: only the media missing or
+    changed locally are downloaded. With `prune`, local media the appstore no longer has are deleted."""
     app_dir = os.path.join(asset_dir, bundle_id)
 
     print_clr(
@@ -254,10 +559,10 @@ def download(
     )
 
     # App
-    if os.path.isdir(app_dir) and not overwrite:
+    if os.path.isdir(app_dir) and not (overwrite or sync):
         raise FileExistsError(
             f"App directory {colorama.Fore.CYAN}{app_dir}{colorama.Fore.RESET} already exists. "
-            + "Specify '--overwrite' if you wish to force downloading to an existing directory."
+            + "Specify '--sync' to update it, or '--overwrite' if you wish to force downloading to an existing directory."
         )
 
     download_info(
@@ -274,5 +579,8 @@ def download(
         bundle_id=bundle_id,
         platforms=platforms,
         version_states=version_states,
+        jobs=jobs,
+        sync=sync,
+        prune=prune,
     )
     print_clr(colorama.Fore.GREEN + "Download complete")
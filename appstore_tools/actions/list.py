@@ -147,28 +147,21 @@ def list_screenshots(
             f"{colorama.Fore.GREEN}{version_state} {colorama.Style.DIM}{version_id} "
         )
 
-        localizations = appstore.get_version_localizations(
-            version_id=version_id, access_token=access_token
+        localizations = appstore.get_version_media_tree(
+            version_id=version_id, access_token=access_token, previews=False
         )
 
         for loc in localizations:
-            loc_id = loc["id"]
             locale = loc["attributes"]["locale"]
-
-            screenshot_sets = appstore.get_screenshot_sets(
-                localization_id=loc_id, access_token=access_token
-            )
+            screenshot_sets = loc["screenshotSets"]
             print_clr(
                 f"{colorama.Fore.GREEN}{locale}: ",
                 f"Found {colorama.Fore.CYAN}{len(screenshot_sets)}{colorama.Fore.RESET} screenshot sets.",
             )
 
             for screenshot_set in screenshot_sets:
-                ss_set_id = screenshot_set["id"]
                 ss_display_type = screenshot_set["attributes"]["screenshotDisplayType"]
-                screenshots = appstore.get_screenshots(
-                    screenshot_set_id=ss_set_id, access_token=access_token
-                )
+                screenshots = screenshot_set["screenshots"]
                 if verbosity == Verbosity.SHORT:
                     print_clr(colorama.Fore.CYAN + ss_display_type)
                     for x in screenshots:
@@ -243,26 +236,21 @@ def list_previews(
             f"{colorama.Fore.GREEN}version: {colorama.Fore.BLUE}{version_id} {version_state}"
         )
 
-        localizations = appstore.get_version_localizations(
-            version_id=version_id, access_token=access_token
+        localizations = appstore.get_version_media_tree(
+            version_id=version_id, access_token=access_token, screenshots=False
         )
 
-        localization_ids = (l["id"] for l in localizations)
-        for loc_id in localization_ids:
-            preview_sets = appstore.get_preview_sets(
-                localization_id=loc_id, access_token=access_token
-            )
+        for loc in localizations:
+            loc_id = loc["id"]
+            preview_sets = loc["previewSets"]
             print_clr(
                 f"{colorama.Fore.GREEN}loc_id {loc_id}: ",
                 f"Found {colorama.Fore.CYAN}{len(preview_sets)}{colorama.Fore.RESET} preview sets.",
             )
 
             for preview_set in preview_sets:
-                preview_set_id = preview_set["id"]
                 preview_type = preview_set["attributes"]["previewType"]
-                previews = appstore.get_previews(
-                    preview_set_id=preview_set_id, access_token=access_token
-                )
+                previews = preview_set["previews"]
                 if verbosity == Verbosity.SHORT:
                     print_clr(colorama.Fore.CYAN + preview_type)
                     for x in previews:
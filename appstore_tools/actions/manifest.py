@@ -0,0 +1,50 @@
+import time
+import hashlib
+from typing import Mapping
+from appstore_tools.cache_util import read_json_cache, write_json_cache
+
+from .assets import MediaSetAssets
+from .util import file_checksum
+
+PUBLISH_MANIFEST_CACHE_NAME = "publish_manifest.json"
+
+# The manifest records, per app version, what the last successful publish left on the
+# appstore:
+#   {"<version id>": {"time": 1600000000.0, "locales": {"en-US": {
+#       "id": "<localization id>",
+#       "screenshotSets": {"APP_IPHONE_65": "<fingerprint>", ...},
+#       "previewSets": {"IPHONE_65": "<fingerprint>", ...}}}}}
+# A set missing from the manifest (or a kind set to None) is always checked.
+
+
+def get_set_fingerprint(set_assets: MediaSetAssets) -> str:
+    """Fingerprint the files in a screenshot/preview set by name and content, leaving out
+    ignored files. Content checksums come from the checksum cache, so unchanged files
+    aren't re-read."""
+    fingerprint = hashlib.md5()
+    for file_name, asset in set_assets.files.items():
+        if asset.path in set_assets.ignored:
+            continue
+        checksum = file_checksum(asset.path, asset.stat)
+        fingerprint.update(f"{file_name}\0{checksum}\n".encode("utf-8"))
+    for file_name, attributes in sorted(set_assets.attributes.items()):
+        checksum = hashlib.md5(attributes.encode("utf-8")).hexdigest()
+        fingerprint.update(f"{file_name}.json\0{checksum}\n".encode("utf-8"))
+    return fingerprint.hexdigest()
+
+
+def get_set_fingerprints(sets: Mapping[str, MediaSetAssets]) -> dict:
+    """Fingerprint each set (by display/preview type) of a locale's screenshots/previews."""
+    return {name: get_set_fingerprint(set_assets) for name, set_assets in sets.items()}
+
+
+def read_publish_manifest(version_id: str) -> dict:
+    """Reads the manifest locales of the last successful publish to an app version."""
+    manifest = read_json_cache(PUBLISH_MANIFEST_CACHE_NAME).get(version_id, {})
+    return manifest.get("locales", {})
+
+
+def write_publish_manifest(version_id: str, locales: dict) -> None:
+    manifest = read_json_cache(PUBLISH_MANIFEST_CACHE_NAME)
+    manifest[version_id] = {"time": time.time(), "locales": locales}
+    write_json_cache(PUBLISH_MANIFEST_CACHE_NAME, manifest)
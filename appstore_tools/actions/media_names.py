@@ -0,0 +1,51 @@
+import threading
+from typing import Sequence
+from appstore_tools.cache_util import read_json_cache, write_json_cache
+
+MEDIA_NAMES_CACHE_NAME = "media_names.json"
+
+# The appstore can't rename a screenshot/preview, so media matched to a renamed asset
+# file (see `match_media_files`) keep their uploaded file name. Their local file names
+# are recorded by media id, for downloads to write the files under the same names:
+#   {"<screenshot/preview id>": "01.png"}
+# Media whose local file name is the appstore file name have no entry.
+
+_media_names = None
+_media_names_lock = threading.Lock()
+
+
+def _load() -> dict:
+    global _media_names
+    if _media_names is None:
+        _media_names = read_json_cache(MEDIA_NAMES_CACHE_NAME)
+    return _media_names
+
+
+def get_local_file_name(media: dict) -> str:
+    """Gets the file name of a screenshot/preview's local asset file: the recorded name
+    of a renamed file, or else the appstore file name."""
+    with _media_names_lock:
+        file_name = _load().get(media["id"])
+    return file_name if file_name is not None else media["attributes"]["fileName"]
+
+
+def record_local_file_names(media: Sequence[dict], file_names: dict) -> None:
+    """Record the local file names of media matched to asset files.
+
+    Args:
+        file_names: the matched asset file name, by media id
+    """
+    with _media_names_lock:
+        media_names = _load()
+        changed = False
+        for x in media:
+            file_name = file_names.get(x["id"])
+            if file_name is None:
+                continue
+            if file_name != x["attributes"]["fileName"]:
+                changed |= media_names.get(x["id"]) != file_name
+                media_names[x["id"]] = file_name
+            elif media_names.pop(x["id"], None) is not None:
+                changed = True
+        if changed:
+            write_json_cache(MEDIA_NAMES_CACHE_NAME, media_names)
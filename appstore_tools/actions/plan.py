@@ -0,0 +1,869 @@
+import os
+import json
+import heapq
+import functools
+import colorama
+import concurrent.futures
+from typing import Union, Sequence
+from appstore_tools import appstore
+from appstore_tools.print_util import print_clr, json_file, output_group
+from appstore_tools.appstore.auth import AccessToken
+
+from .waiter import MediaProcessingWaiter, is_processing
+from .assets import AssetIndex, LocaleAssets, scan_assets
+from .util import (
+    get_attributes_file_path,
+    read_txt_file,
+    write_txt_file,
+    file_checksum,
+    save_checksum_cache,
+    print_locale_status,
+    print_media_set_status,
+    print_media_status,
+)
+from .publish import (
+    read_localization_assets,
+    get_changed_keys,
+    match_media_files,
+    get_media_order,
+    get_new_file_paths,
+    get_media_file_name,
+    publish_screenshot,
+    publish_preview,
+    get_preview_time_code,
+)
+
+PLAN_FORMAT_VERSION = 2
+
+# A plan is a json document listing the operations needed to make the appstore match the
+# assets on disk. Each operation is a dict:
+#   {"id": "3", "action": "upload_screenshot", "target": "en-US/APP_IPHONE_65/1.png",
+#    "deps": ["1"], "params": {"screenshot_set_id": {"ref": "1"}, ...}}
+# A {"ref": op_id} param is replaced, when applied, by the id of the resource that
+# operation created. Operations run once all of their deps and refs have finished.
+
+# Weight of an operation when prioritizing the critical path. Uploads dominate.
+UPLOAD_OP_WEIGHT = 10
+
+
+def ref(op_id: str) -> dict:
+    """Reference the id of the resource created by a planned operation."""
+    return {"ref": op_id}
+
+
+def is_ref(value) -> bool:
+    return isinstance(value, dict) and set(value.keys()) == {"ref"}
+
+
+def get_op_refs(value) -> list:
+    """Gets the operation ids referenced by a param value."""
+    if is_ref(value):
+        return [value["ref"]]
+    if isinstance(value, list):
+        return [r for x in value for r in get_op_refs(x)]
+    if isinstance(value, dict):
+        return [r for x in value.values() for r in get_op_refs(x)]
+    return []
+
+
+def get_op_deps(op: dict) -> list:
+    """Gets the operation ids that must finish before this operation can run."""
+    deps = list(op.get("deps", []))
+    for op_id in get_op_refs(op["params"]):
+        if op_id not in deps:
+            deps.append(op_id)
+    return deps
+
+
+def add_op(
+    plan: dict,
+    action: str,
+    target: str,
+    params: dict,
+    deps: Sequence[str] = (),
+) -> str:
+    """Append an operation to the plan.
+
+    Returns:
+        str: the operation id, for use in `ref` and `deps`
+    """
+    op_id = str(len(plan["ops"]) + 1)
+    plan["ops"].append(
+        {
+            "id": op_id,
+            "action": action,
+            "target": target,
+            "deps": list(deps),
+            "params": params,
+        }
+    )
+    return op_id
+
+
+def plan_screenshot_sets(
+    plan: dict,
+    locale_assets: LocaleAssets,
+    localization_id: Union[str, dict],  # pylint: disable=unsubscriptable-object
+    locale: str,
+    screenshot_sets: Sequence[dict],
+):
+    asset_sets = locale_assets.screenshot_sets
+    if asset_sets is None:
+        screenshots_dir = os.path.join(locale_assets.path, "screenshots")
+        print_clr(
+            f"    No screenshots: directory {colorama.Fore.CYAN}{screenshots_dir}{colorama.Fore.RESET} not found.",
+        )
+        return
+
+    # Existing display types, then new ones
+    display_type_sets = {
+        x["attributes"]["screenshotDisplayType"]: x for x in screenshot_sets
+    }
+    for display_type in asset_sets:
+        display_type_sets.setdefault(display_type, None)
+
+    for display_type, screenshot_set in display_type_sets.items():
+        set_assets = asset_sets.get(display_type)
+        target = f"{locale}/{display_type}"
+
+        # Delete removed display types
+        if set_assets is None:
+            add_op(
+                plan,
+                action="delete_screenshot_set",
+                target=target,
+                params={"screenshot_set_id": screenshot_set["id"]},
+            )
+            continue
+
+        # Create new display types
+        if screenshot_set is None:
+            screenshot_set_id = ref(
+                add_op(
+                    plan,
+                    action="create_screenshot_set",
+                    target=target,
+                    params={
+                        "localization_id": localization_id,
+                        "display_type": display_type,
+                    },
+                )
+            )
+            screenshots = []
+        else:
+            screenshot_set_id = screenshot_set["id"]
+            screenshots = screenshot_set["screenshots"]
+
+        print_media_set_status(display_type, colorama.Fore.CYAN, "checking for changes")
+
+        # Delete outdated screenshots. Renamed files keep their screenshot.
+        file_names = match_media_files(screenshots, set_assets)
+        delete_ops = []
+        kept = []
+        for screenshot in screenshots:
+            if screenshot["id"] in file_names:
+                kept.append(screenshot)
+            else:
+                delete_ops.append(
+                    add_op(
+                        plan,
+                        action="delete_screenshot",
+                        target=f"{target}/{get_media_file_name(screenshot)}",
+                        params={"screenshot_id": screenshot["id"]},
+                    )
+                )
+
+        # Upload new screenshots, after the deletes make room in the set
+        uploads = []
+        for file_path in get_new_file_paths(kept, set_assets, file_names):
+            if file_path in set_assets.ignored:
+                print_media_status(
+                    file_path,
+                    colorama.Fore.CYAN + colorama.Style.DIM,
+                    "ignoring",
+                )
+                continue
+            file_name = os.path.basename(file_path)
+            op_id = add_op(
+                plan,
+                action="upload_screenshot",
+                target=f"{target}/{file_name}",
+                params={
+                    "screenshot_set_id": screenshot_set_id,
+                    "screenshot_path": file_path,
+                    "checksum": file_checksum(file_path),
+                },
+                deps=delete_ops,
+            )
+            uploads.append((file_name, ref(op_id)))
+
+        # Reorder, once every screenshot is in place.
+        # Concurrent uploads land in any order, so only skip when nothing was uploaded.
+        if uploads:
+            media = [(get_media_file_name(x, file_names), x["id"]) for x in kept]
+            media += uploads
+            screenshot_ids = [x for _, x in sorted(media, key=lambda x: x[0])]
+        else:
+            screenshot_ids = get_media_order(kept, file_names=file_names)
+        if screenshot_ids is not None:
+            add_op(
+                plan,
+                action="reorder_screenshots",
+                target=target,
+                params={
+                    "screenshot_set_id": screenshot_set_id,
+                    "screenshot_ids": screenshot_ids,
+                },
+                deps=delete_ops,
+            )
+
+
+def plan_preview_sets(
+    plan: dict,
+    locale_assets: LocaleAssets,
+    localization_id: Union[str, dict],  # pylint: disable=unsubscriptable-object
+    locale: str,
+    preview_sets: Sequence[dict],
+):
+    asset_sets = locale_assets.preview_sets
+    if asset_sets is None:
+        previews_dir = os.path.join(locale_assets.path, "previews")
+        print_clr(
+            f"    No previews: directory {colorama.Fore.CYAN}{previews_dir}{colorama.Fore.RESET} not found.",
+        )
+        return
+
+    # Existing preview types, then new ones
+    preview_type_sets = {x["attributes"]["previewType"]: x for x in preview_sets}
+    for preview_type in asset_sets:
+        preview_type_sets.setdefault(preview_type, None)
+
+    for preview_type, preview_set in preview_type_sets.items():
+        set_assets = asset_sets.get(preview_type)
+        target = f"{locale}/{preview_type}"
+
+        # Delete removed preview types
+        if set_assets is None:
+            add_op(
+                plan,
+                action="delete_preview_set",
+                target=target,
+                params={"preview_set_id": preview_set["id"]},
+            )
+            continue
+
+        # Create new preview types
+        if preview_set is None:
+            preview_set_id = ref(
+                add_op(
+                    plan,
+                    action="create_preview_set",
+                    target=target,
+                    params={
+                        "localization_id": localization_id,
+                        "preview_type": preview_type,
+                    },
+                )
+            )
+            previews = []
+        else:
+            preview_set_id = preview_set["id"]
+            previews = preview_set["previews"]
+
+        print_media_set_status(preview_type, colorama.Fore.CYAN, "checking for changes")
+
+        # Delete outdated previews. Renamed files keep their preview.
+        file_names = match_media_files(previews, set_assets)
+        delete_ops = []
+        kept = []
+        for preview in previews:
+            if preview["id"] in file_names:
+                kept.append(preview)
+            else:
+                delete_ops.append(
+                    add_op(
+                        plan,
+                        action="delete_preview",
+                        target=f"{target}/{get_media_file_name(preview)}",
+                        params={"preview_id": preview["id"]},
+                    )
+                )
+
+        # Upload new previews, after the deletes make room in the set
+        uploads = []
+        for file_path in get_new_file_paths(kept, set_assets, file_names):
+            if file_path in set_assets.ignored:
+                print_media_status(
+                    file_path,
+                    colorama.Fore.CYAN + colorama.Style.DIM,
+                    "ignoring",
+                )
+                continue
+            file_name = os.path.basename(file_path)
+            attributes_path = get_attributes_file_path(file_path)
+            if attributes_path in set_assets.ignored:
+                attributes_path = ""
+            op_id = add_op(
+                plan,
+                action="upload_preview",
+                target=f"{target}/{file_name}",
+                params={
+                    "preview_set_id": preview_set_id,
+                    "preview_path": file_path,
+                    "attributes_path": attributes_path,
+                    "checksum": file_checksum(file_path),
+                },
+                deps=delete_ops,
+            )
+            uploads.append((file_name, ref(op_id)))
+
+        # Update existing preview attributes. New previews get theirs with the upload.
+        for preview in kept:
+            file_name = get_media_file_name(preview, file_names)
+            attributes_path = get_attributes_file_path(
+                os.path.join(set_assets.path, file_name)
+            )
+            if attributes_path in set_assets.ignored:
+                print_media_status(
+                    attributes_path,
+                    colorama.Fore.CYAN + colorama.Style.DIM,
+                    "ignoring",
+                )
+                continue
+
+            time_code = get_preview_time_code(set_assets.attributes.get(file_name))
+            if not time_code or (
+                time_code == preview["attributes"]["previewFrameTimeCode"]
+            ):
+                continue
+            add_op(
+                plan,
+                action="update_preview_attributes",
+                target=f"{target}/{os.path.basename(attributes_path)}",
+                params={
+                    "preview_set_id": preview_set_id,
+                    "preview_id": preview["id"],
+                    "preview_frame_time_code": time_code,
+                },
+            )
+
+        # Reorder, once every preview is in place.
+        # Concurrent uploads land in any order, so only skip when nothing was uploaded.
+        if uploads:
+            media = [(get_media_file_name(x, file_names), x["id"]) for x in kept]
+            media += uploads
+            preview_ids = [x for _, x in sorted(media, key=lambda x: x[0])]
+        else:
+            preview_ids = get_media_order(kept, file_names=file_names)
+        if preview_ids is not None:
+            add_op(
+                plan,
+                action="reorder_previews",
+                target=target,
+                params={"preview_set_id": preview_set_id, "preview_ids": preview_ids},
+                deps=delete_ops,
+            )
+
+
+def plan_version_localizations(
+    plan: dict,
+    access_token: AccessToken,
+    assets: AssetIndex,
+    version_id: str,
+    allow_create_locale: bool = True,
+    allow_delete_locale: bool = True,
+):
+    localizations = appstore.get_version_media_tree(
+        version_id=version_id, access_token=access_token
+    )
+
+    version_locales = [loc["attributes"]["locale"] for loc in localizations]
+    attribute_keys = list(appstore.VersionLocalizationAttributes.__annotations__.keys())
+
+    # Delete removed locales, update existing ones
+    for loc in localizations:
+        locale = loc["attributes"]["locale"]
+        locale_assets = assets.locales.get(locale)
+
+        if locale_assets is None:
+            if allow_delete_locale:
+                add_op(
+                    plan,
+                    action="delete_version_localization",
+                    target=locale,
+                    params={"localization_id": loc["id"]},
+                )
+            else:
+                print_locale_status(
+                    locale, colorama.Fore.LIGHTBLACK_EX, "locale deletion not allowed"
+                )
+            continue
+
+        asset_loc_data = read_localization_assets(
+            locale_assets=locale_assets, keys=attribute_keys
+        )
+        loc_diff_keys = get_changed_keys(asset_loc_data, loc["attributes"])
+        if len(loc_diff_keys) > 0:
+            print_locale_status(
+                locale,
+                colorama.Fore.CYAN,
+                f"locale changed {colorama.Fore.CYAN}{colorama.Style.DIM}{loc_diff_keys}",
+            )
+            add_op(
+                plan,
+                action="update_version_localization",
+                target=locale,
+                params={
+                    "localization_id": loc["id"],
+                    "localization_attributes": {
+                        k: asset_loc_data[k] for k in loc_diff_keys
+                    },
+                },
+            )
+        else:
+            print_locale_status(
+                locale, colorama.Fore.CYAN, "no changes in version settings"
+            )
+
+        plan_screenshot_sets(
+            plan=plan,
+            locale_assets=locale_assets,
+            localization_id=loc["id"],
+            locale=locale,
+            screenshot_sets=loc["screenshotSets"],
+        )
+        plan_preview_sets(
+            plan=plan,
+            locale_assets=locale_assets,
+            localization_id=loc["id"],
+            locale=locale,
+            preview_sets=loc["previewSets"],
+        )
+
+    # Create new locales, with their text attributes set on creation
+    for locale, locale_assets in assets.locales.items():
+        if locale in version_locales:
+            continue
+        if not allow_create_locale:
+            print_locale_status(
+                locale, colorama.Fore.LIGHTBLACK_EX, "locale creation not allowed"
+            )
+            continue
+
+        localization_id = ref(
+            add_op(
+                plan,
+                action="create_version_localization",
+                target=locale,
+                params={
+                    "version_id": version_id,
+                    "locale": locale,
+                    "localization_attributes": read_localization_assets(
+                        locale_assets=locale_assets, keys=attribute_keys
+                    ),
+                },
+            )
+        )
+        plan_screenshot_sets(
+            plan=plan,
+            locale_assets=locale_assets,
+            localization_id=localization_id,
+            locale=locale,
+            screenshot_sets=[],
+        )
+        plan_preview_sets(
+            plan=plan,
+            locale_assets=locale_assets,
+            localization_id=localization_id,
+            locale=locale,
+            preview_sets=[],
+        )
+
+
+def plan_info_localizations(
+    plan: dict,
+    access_token: AccessToken,
+    assets: AssetIndex,
+    info_id: str,
+):
+    localizations = appstore.get_info_localizations(
+        info_id=info_id, access_token=access_token
+    )
+    attribute_keys = list(appstore.InfoLocalizationAttributes.__annotations__.keys())
+
+    for loc in localizations:
+        locale = loc["attributes"]["locale"]
+        locale_assets = assets.locales.get(locale)
+        if locale_assets is None:
+            continue
+
+        asset_loc_data = read_localization_assets(
+            locale_assets=locale_assets, keys=attribute_keys
+        )
+        loc_diff_keys = get_changed_keys(asset_loc_data, loc["attributes"])
+        if len(loc_diff_keys) > 0:
+            print_locale_status(
+                locale,
+                colorama.Fore.CYAN,
+                f"app info changed {colorama.Fore.CYAN}{colorama.Style.DIM}{loc_diff_keys}",
+            )
+            add_op(
+                plan,
+                action="update_info_localization",
+                target=locale,
+                params={
+                    "info_localization_id": loc["id"],
+                    "info_localization_attributes": {
+                        k: asset_loc_data[k] for k in loc_diff_keys
+                    },
+                },
+            )
+        else:
+            print_locale_status(
+                locale, colorama.Fore.CYAN, "no changes in app settings"
+            )
+
+
+def plan_publish(
+    access_token: AccessToken,
+    asset_dir: str,
+    app_id: str,
+    bundle_id: str,
+    platform: Union[appstore.Platform, str],  # pylint: disable=unsubscriptable-object
+    version_string: str,
+    update_version_string: bool,
+    media_completion_timeout_secs: float = 300,
+    asset_ignore: str = "",
+    allow_create_version: bool = True,
+    allow_create_locale: bool = True,
+    allow_delete_locale: bool = True,
+) -> dict:
+    """Compute the operations `publish` would make, without changing anything on the appstore.
+    The returned plan is json serializable, and can be run later with `apply_plan`."""
+    print_clr("Planning assets from directory: ", colorama.Fore.CYAN + asset_dir)
+
+    app_dir = os.path.join(asset_dir, bundle_id)
+    if not os.path.isdir(app_dir):
+        raise FileNotFoundError(
+            f"App directory {colorama.Fore.CYAN}{app_dir}{colorama.Fore.RESET} not found. "
+        )
+    assets = scan_assets(app_dir, asset_ignore)
+
+    plan = {
+        "version": PLAN_FORMAT_VERSION,
+        "appId": str(app_id),
+        "bundleId": bundle_id,
+        "platform": appstore.enum_name(platform),
+        "mediaCompletionTimeoutSecs": float(media_completion_timeout_secs),
+        "notes": [],
+        "ops": [],
+    }
+
+    try:
+        versions = appstore.get_versions(
+            app_id=app_id,
+            access_token=access_token,
+            platforms=[platform],
+            states=appstore.editable_version_states,
+            fields=["versionString"],
+        )
+        print_clr(
+            f"Found {colorama.Fore.CYAN}{len(versions)}{colorama.Fore.RESET} editable app versions ",
+            f"for {colorama.Fore.CYAN}{platform}{colorama.Fore.RESET}.",
+        )
+
+        if len(versions) == 0 and allow_create_version:
+            add_op(
+                plan,
+                action="create_version",
+                target=version_string,
+                params={
+                    "app_id": str(app_id),
+                    "platform": appstore.enum_name(platform),
+                    "version_string": version_string,
+                },
+            )
+            # The appstore seeds a new version's localizations from the previous version,
+            # so they can't be diffed until it exists.
+            plan["notes"].append(
+                "The app version localizations are planned once the new version exists. "
+                + "Plan again after applying this plan."
+            )
+        for v in versions:
+            version_id = v["id"]
+            if (
+                update_version_string
+                and v["attributes"].get("versionString") != version_string
+            ):
+                add_op(
+                    plan,
+                    action="update_version",
+                    target=version_id,
+                    params={
+                        "version_id": version_id,
+                        "version_attributes": {"versionString": version_string},
+                    },
+                )
+
+            print_clr(
+                f"{colorama.Fore.GREEN}Version ",
+                f"{colorama.Fore.BLUE}{version_id} ",
+                f"{colorama.Fore.CYAN}{v['attributes']['appStoreState']} ",
+            )
+            plan_version_localizations(
+                plan=plan,
+                access_token=access_token,
+                assets=assets,
+                version_id=version_id,
+                allow_create_locale=allow_create_locale,
+                allow_delete_locale=allow_delete_locale,
+            )
+
+        infos = appstore.get_infos(
+            app_id=app_id,
+            access_token=access_token,
+            states=appstore.editable_version_states,
+            fields=["appStoreState"],
+        )
+        print_clr(
+            f"Found {colorama.Fore.CYAN}{len(infos)}{colorama.Fore.RESET} editable app infos."
+        )
+        for info in infos:
+            print_clr(
+                colorama.Fore.GREEN + "AppInfo ",
+                colorama.Fore.BLUE + f"{info['id']} ",
+                colorama.Fore.CYAN + f"{info['attributes']['appStoreState']}",
+            )
+            plan_info_localizations(
+                plan=plan,
+                access_token=access_token,
+                assets=assets,
+                info_id=info["id"],
+            )
+    finally:
+        save_checksum_cache()
+    return plan
+
+
+def print_plan(plan: dict):
+    """Print the plan's operations, one per line."""
+    action_colors = {
+        "create": colorama.Fore.YELLOW,
+        "upload": colorama.Fore.YELLOW,
+        "delete": colorama.Fore.RED,
+    }
+    for op in plan["ops"]:
+        color = action_colors.get(op["action"].split("_")[0], colorama.Fore.CYAN)
+        deps = get_op_deps(op)
+        print_clr(
+            f"{colorama.Style.DIM}{op['id']:>4} ",
+            f"{color}{op['action']} ",
+            f"{op['target']}",
+            f" {colorama.Style.DIM}after {','.join(deps)}" if deps else "",
+        )
+    for note in plan["notes"]:
+        print_clr(f"{colorama.Fore.LIGHTBLACK_EX}{note}")
+    print_clr(
+        f"Plan: {colorama.Fore.CYAN}{len(plan['ops'])}{colorama.Fore.RESET} operations."
+    )
+
+
+def write_plan_file(path: str, plan: dict):
+    write_txt_file(path, json_file(plan))
+
+
+def read_plan_file(path: str) -> dict:
+    content = read_txt_file(path)
+    if content is None:
+        raise FileNotFoundError(f"Plan file not found: {path}")
+    plan = json.loads(content)
+    if plan.get("version") != PLAN_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported plan version {plan.get('version')} in {path} (expected {PLAN_FORMAT_VERSION})"
+        )
+    return plan
+
+
+def check_asset_unchanged(path: str, checksum: str):
+    """Make sure an asset still has the contents it was planned with."""
+    if file_checksum(path) != checksum:
+        raise RuntimeError(f"Asset changed since the plan was made: {path}")
+
+
+def apply_upload_screenshot(
+    access_token: AccessToken,
+    screenshot_set_id: str,
+    screenshot_path: str,
+    checksum: str,
+):
+    check_asset_unchanged(screenshot_path, checksum)
+    return publish_screenshot(
+        access_token=access_token,
+        screenshot_path=screenshot_path,
+        screenshot_set_id=screenshot_set_id,
+    )
+
+
+def apply_upload_preview(
+    access_token: AccessToken,
+    preview_set_id: str,
+    preview_path: str,
+    attributes_path: str,
+    checksum: str,
+):
+    check_asset_unchanged(preview_path, checksum)
+    return publish_preview(
+        access_token=access_token,
+        preview_path=preview_path,
+        attributes_path=attributes_path,
+        preview_set_id=preview_set_id,
+    )
+
+
+def apply_update_preview_attributes(
+    access_token: AccessToken,
+    waiter: MediaProcessingWaiter,
+    preview_set_id: str,
+    preview_id: str,
+    preview_frame_time_code: str,
+):
+    preview = appstore.get_preview(preview_id=preview_id, access_token=access_token)
+    if is_processing(preview):
+        (preview,) = waiter.wait(
+            kind="previews", set_id=preview_set_id, media=[preview]
+        )
+    if (
+        preview["attributes"]["assetDeliveryState"]["state"]
+        != appstore.MediaAssetState.COMPLETE.name
+    ):
+        raise RuntimeError(
+            f"Preview {preview_id} did not complete processing within {waiter.timeout_secs}s"
+        )
+    return appstore.update_preview(
+        preview_id=preview_id,
+        access_token=access_token,
+        preview_frame_time_code=preview_frame_time_code,
+    )
+
+
+PLAN_ACTIONS = {
+    "create_version": appstore.create_version,
+    "update_version": appstore.update_version,
+    "create_version_localization": appstore.create_version_localization,
+    "update_version_localization": appstore.update_version_localization,
+    "delete_version_localization": appstore.delete_version_localization,
+    "update_info_localization": appstore.update_info_localization,
+    "create_screenshot_set": appstore.create_screenshot_set,
+    "delete_screenshot_set": appstore.delete_screenshot_set,
+    "delete_screenshot": appstore.delete_screenshot,
+    "upload_screenshot": apply_upload_screenshot,
+    "reorder_screenshots": appstore.update_screenshot_order,
+    "create_preview_set": appstore.create_preview_set,
+    "delete_preview_set": appstore.delete_preview_set,
+    "delete_preview": appstore.delete_preview,
+    "upload_preview": apply_upload_preview,
+    "reorder_previews": appstore.update_preview_order,
+}
+
+
+def resolve_refs(value, results: dict):
+    """Replace the `ref`s in a param value with the ids of the created resources."""
+    if is_ref(value):
+        return results[value["ref"]]["id"]
+    if isinstance(value, list):
+        return [resolve_refs(x, results) for x in value]
+    if isinstance(value, dict):
+        return {k: resolve_refs(x, results) for k, x in value.items()}
+    return value
+
+
+def get_op_ranks(ops: Sequence[dict], dependents: dict) -> dict:
+    """Rank each operation by the weight of the longest chain of operations it starts,
+    so the scheduler can run the critical path first."""
+    ranks = {}
+    # Deps always precede their dependents in a plan, so walk it backwards
+    for op in reversed(ops):
+        weight = UPLOAD_OP_WEIGHT if op["action"].startswith("upload_") else 1
+        ranks[op["id"]] = weight + max(
+            (ranks.get(x, 0) for x in dependents[op["id"]]), default=0
+        )
+    return ranks
+
+
+def apply_plan(
+    plan: dict,
+    access_token: AccessToken,
+    jobs: int = 1,
+):
+    """Run the plan's operations on up to `jobs` worker threads.
+    Each operation starts as soon as the operations it depends on have finished."""
+    ops = {op["id"]: op for op in plan["ops"]}
+    deps = {op_id: set(get_op_deps(op)) for op_id, op in ops.items()}
+    dependents = {op_id: [] for op_id in ops}
+    for op_id, op_deps in deps.items():
+        for dep in op_deps:
+            if dep not in ops:
+                raise ValueError(f"Plan operation {op_id} depends on unknown {dep}")
+            dependents[dep].append(op_id)
+    ranks = get_op_ranks(plan["ops"], dependents)
+
+    print_clr(
+        f"Applying {colorama.Fore.CYAN}{len(ops)}{colorama.Fore.RESET} operations ",
+        f"for {colorama.Fore.CYAN}{plan['bundleId']}{colorama.Fore.RESET}.",
+    )
+
+    # Preview processing is waited on with one deadline for the whole plan
+    waiter = MediaProcessingWaiter(
+        access_token=access_token, timeout_secs=plan["mediaCompletionTimeoutSecs"]
+    )
+    actions = {
+        **PLAN_ACTIONS,
+        "update_preview_attributes": functools.partial(
+            apply_update_preview_attributes, waiter=waiter
+        ),
+    }
+    results = {}
+
+    def run(op: dict):
+        with output_group():
+            print_clr(
+                f"{colorama.Style.DIM}{op['id']:>4} ",
+                f"{colorama.Fore.CYAN}{op['action']} ",
+                f"{op['target']}",
+            )
+            return actions[op["action"]](
+                access_token=access_token, **resolve_refs(op["params"], results)
+            )
+
+    # Ready operations, longest remaining chain first
+    ready = [(-ranks[op_id], int(op_id), op_id) for op_id in ops if not deps[op_id]]
+    heapq.heapify(ready)
+    running = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            while ready or running:
+                while ready and len(running) < jobs:
+                    _, _, op_id = heapq.heappop(ready)
+                    running[executor.submit(run, ops[op_id])] = op_id
+
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    op_id = running.pop(future)
+                    results[op_id] = future.result() or {}
+                    for dependent in dependents[op_id]:
+                        deps[dependent].discard(op_id)
+                        if not deps[dependent]:
+                            heapq.heappush(
+                                ready, (-ranks[dependent], int(dependent), dependent)
+                            )
+    finally:
+        save_checksum_cache()
+
+    if len(results) < len(ops):
+        raise ValueError("Plan operations have circular dependencies")
+
+    for note in plan["notes"]:
+        print_clr(f"{colorama.Fore.LIGHTBLACK_EX}{note}")
+    print_clr(colorama.Fore.GREEN + "Apply complete")
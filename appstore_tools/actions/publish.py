@@ -1,28 +1,88 @@
 import os
 import hashlib
 import colorama
-import requests
-import re
 import json
 import time
-from typing import Union, Sequence
+import requests
+import functools
+import threading
+import concurrent.futures
+from typing import Union, Sequence, Optional, Callable
 from appstore_tools import appstore
-from appstore_tools.print_util import print_clr, clr, json_term
+from appstore_tools.appstore.retry import backoff_secs, should_retry
+from appstore_tools.print_util import print_clr, clr, json_term, bind_output_group
 from appstore_tools.appstore.auth import AccessToken
 
+from .waiter import MediaProcessingWaiter, is_processing
+from .assets import (
+    AssetIndex,
+    LocaleAssets,
+    MediaSetAssets,
+    scan_assets,
+    TEXT_FILE_EXT,
+)
+from .media_names import record_local_file_names
+from .upload_journal import (
+    get_resumable_upload,
+    start_upload,
+    journal_part,
+    discard_upload,
+)
+from .manifest import (
+    get_set_fingerprints,
+    read_publish_manifest,
+    write_publish_manifest,
+)
 from .util import (
     get_attributes_file_path,
     read_txt_file,
+    file_checksum,
+    save_checksum_cache,
+    HASH_CHUNK_SIZE,
+    run_concurrently,
     print_locale_status,
     print_media_set_status,
     print_media_status,
 )
 
+DEFAULT_UPLOAD_PART_JOBS = 4
+UPLOAD_PART_RETRIES = 3
+# Files uploading at once in each media set, and the cap on bytes in flight across all sets
+MEDIA_PIPELINE_JOBS = 3
+MAX_INFLIGHT_UPLOAD_BYTES = 64 * 1024 * 1024
+
+
+def read_localization_assets(locale_assets: LocaleAssets, keys: Sequence[str]) -> dict:
+    """Read the localized text attributes of the `<key>.txt` files in a locale.
+    Missing and ignored files are left out."""
+    asset_loc_data = {}
+    for key in keys:
+        path = os.path.join(locale_assets.path, key + TEXT_FILE_EXT)
+        if path in locale_assets.ignored:
+            print_locale_status(
+                locale_assets.locale,
+                colorama.Fore.CYAN,
+                f"ignoring {colorama.Fore.CYAN}{colorama.Style.DIM}{path}",
+            )
+        elif key in locale_assets.texts:
+            asset_loc_data[key] = locale_assets.texts[key]
+    return asset_loc_data
+
+
+def get_changed_keys(asset_loc_data: dict, localization_attributes: dict) -> list:
+    """Gets the keys whose asset value differs from the appstore value.
+    Missing appstore values compare as empty strings."""
+    return [
+        key
+        for key, value in asset_loc_data.items()
+        if value is not None and value != (localization_attributes.get(key) or "")
+    ]
 
-def media_checksum_ok(media, media_asset_dir: str) -> bool:
+
+def media_checksum_ok(media, set_assets: MediaSetAssets) -> bool:
     """Checks if the appstore checksum matches the asset checksum."""
     file_name = get_media_file_name(media)
-    file_path = os.path.join(media_asset_dir, file_name)
+    asset = set_assets.files.get(file_name)
     appstore_checksum = media["attributes"]["sourceFileChecksum"]
 
     if appstore_checksum is None:
@@ -33,7 +93,7 @@ def media_checksum_ok(media, media_asset_dir: str) -> bool:
         )
         return False
 
-    if not os.path.isfile(file_path):
+    if asset is None:
         print_media_status(
             file_name,
             colorama.Fore.RED,
@@ -41,123 +101,406 @@ def media_checksum_ok(media, media_asset_dir: str) -> bool:
         )
         return False
 
-    with open(file_path, "rb") as file:
-        asset_checksum = hashlib.md5(file.read()).hexdigest()
-        if asset_checksum == appstore_checksum:
-            print_media_status(
-                file_name,
-                colorama.Fore.CYAN + colorama.Style.DIM,
-                clr(
-                    f"checksum matched: ",
-                    f"{colorama.Style.DIM}{asset_checksum}",
-                ),
+    asset_checksum = file_checksum(asset.path, asset.stat)
+    if asset_checksum == appstore_checksum:
+        print_media_status(
+            file_name,
+            colorama.Fore.CYAN + colorama.Style.DIM,
+            clr(
+                f"checksum matched: ",
+                f"{colorama.Style.DIM}{asset_checksum}",
+            ),
+        )
+    else:
+        print_media_status(
+            file_name,
+            colorama.Fore.CYAN,
+            clr(
+                f"checksum changed: ",
+                f"{colorama.Style.DIM}{appstore_checksum} -> {asset_checksum}",
+            ),
+        )
+    return asset_checksum == appstore_checksum
+
+
+class UploadPartRejectedError(requests.exceptions.HTTPError):
+    """The appstore rejected an upload part (a client error that retrying won't fix)."""
+
+
+def upload_media_part(
+    operation: dict,
+    media_asset_path: str,
+    retries: int = UPLOAD_PART_RETRIES,
+) -> None:
+    """Upload one part of a media asset, as described by an upload operation.
+    Transient failures are retried with backoff.
+
+    Raises:
+        UploadPartRejectedError: the part was rejected with a client error
+        requests.exceptions.HTTPError: the part still failed after its retries
+    """
+    method: str = operation["method"]
+    url: str = operation["url"]
+    headers: dict = {}
+    for h in operation["requestHeaders"]:
+        headers[h["name"]] = h["value"]
+    length: int = operation["length"]
+    offset: int = operation["offset"]
+
+    with open(media_asset_path, "rb") as file:
+        file.seek(offset)
+        file_chunk = file.read(length)
+
+    print_media_status(
+        media_asset_path,
+        colorama.Fore.CYAN,
+        f"uploading chunk (offset: {offset}, length: {length})",
+    )
+    attempt = 0
+    while True:
+        try:
+            response = appstore.get_session().request(
+                method=method, url=url, headers=headers, data=file_chunk
             )
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt >= retries:
+                raise
         else:
-            print_media_status(
-                file_name,
-                colorama.Fore.CYAN,
-                clr(
-                    f"checksum changed: ",
-                    f"{colorama.Style.DIM}{appstore_checksum} -> {asset_checksum}",
-                ),
-            )
-        return asset_checksum == appstore_checksum
+            if response.ok:
+                return
+            retryable = should_retry(method, response.status_code)
+            if attempt >= retries or not retryable:
+                message = f"{url} {method} (HttpError {response.status_code}) uploading {media_asset_path} (offset: {offset}, length: {length})"
+                if not retryable and 400 <= response.status_code < 500:
+                    raise UploadPartRejectedError(message)
+                raise requests.exceptions.HTTPError(message)
 
+        print_media_status(
+            media_asset_path,
+            colorama.Fore.YELLOW,
+            f"retrying chunk (offset: {offset}, length: {length})",
+        )
+        time.sleep(backoff_secs(attempt))
+        attempt += 1
 
-def upload_media(media, media_asset_path: str) -> str:
+
+def hash_media_parts(media_asset_path: str, upload_operations: Sequence[dict]) -> str:
+    """Compute the md5 of the uploaded parts, streaming the file in offset order."""
+    file_hash = hashlib.md5()
+    with open(media_asset_path, "rb") as file:
+        for op in sorted(upload_operations, key=lambda x: x["offset"]):
+            file.seek(op["offset"])
+            remaining = op["length"]
+            while remaining > 0:
+                chunk = file.read(min(remaining, HASH_CHUNK_SIZE))
+                if not chunk:
+                    break
+                file_hash.update(chunk)
+                remaining -= len(chunk)
+    return file_hash.hexdigest()
+
+
+def upload_media(
+    media, media_asset_path: str, jobs: int = DEFAULT_UPLOAD_PART_JOBS
+) -> str:
     """Upload media asset (screenshot or preview) to the appstore.
+    Parts are uploaded concurrently by up to `jobs` workers.
+
+    Progress is recorded in the upload journal, and parts the journal records as
+    uploaded (by an interrupted run) are skipped.
 
     Returns:
         str: checksum
     """
-    file_hash = hashlib.md5()
     upload_operations = media["attributes"]["uploadOperations"]
-
-    for op in upload_operations:
-        method: str = op["method"]
-        url: str = op["url"]
-        headers: dict = {}
-        for h in op["requestHeaders"]:
-            headers[h["name"]] = h["value"]
-        length: int = op["length"]
-        offset: int = op["offset"]
-
-        with open(media_asset_path, "rb") as file:
-            file.seek(offset)
-            file_chunk = file.read(length)
-
-        file_hash.update(file_chunk)
+    uploaded = start_upload(media_asset_path, media)
+    if uploaded:
         print_media_status(
             media_asset_path,
             colorama.Fore.CYAN,
-            f"uploading chunk (offset: {offset}, length: {length})",
+            f"resuming upload ({len(uploaded)} of {len(upload_operations)} chunks uploaded)",
         )
-        requests.request(method=method, url=url, headers=headers, data=file_chunk)
-    return file_hash.hexdigest()
 
+    def upload_part(operation: dict) -> None:
+        upload_media_part(operation, media_asset_path)
+        journal_part(media_asset_path, operation["offset"])
 
-def get_media_file_name(media: dict):
-    """Gets the filename for screenshot/preview media with `id` prefixes stripped off."""
-    return media["attributes"]["fileName"].replace(media["id"] + "_", "")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(bind_output_group(upload_part), op)
+            for op in upload_operations
+            if op["offset"] not in uploaded
+        ]
+        # Hash while the parts upload (all of them, since the md5 state of an
+        # interrupted upload isn't journaled)
+        checksum = hash_media_parts(media_asset_path, upload_operations)
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+    return checksum
 
 
-def get_media_file_names(media: Sequence[dict]):
-    return [get_media_file_name(x) for x in media]
+class InflightBytes:
+    """Caps the bytes of media reserved but not yet committed, across all pipelines.
+    A file larger than the cap is let through once nothing else is in flight."""
 
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._bytes = 0
 
-def get_asset_file_names(asset_dir: str, attributes_file_ext: str = ".json"):
-    """Gets the asset files in a directory, ignoring attribute files."""
-    return [
-        x
-        for x in os.listdir(asset_dir)
-        if os.path.isfile(os.path.join(asset_dir, x))
-        and not (attributes_file_ext and x.endswith(attributes_file_ext))
+    def acquire(self, size: int) -> None:
+        with self._cond:
+            while self._bytes > 0 and self._bytes + size > self.max_bytes:
+                self._cond.wait()
+            self._bytes += size
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self._bytes -= size
+            self._cond.notify_all()
+
+
+inflight_upload_bytes = InflightBytes(MAX_INFLIGHT_UPLOAD_BYTES)
+
+
+def publish_media_pipelined(
+    file_paths: Sequence[str],
+    reserve: Callable[[str], dict],
+    commit: Callable[[str, dict, str], dict],
+    jobs: int = MEDIA_PIPELINE_JOBS,
+) -> list:
+    """Publish media files as a pipeline: reserve -> upload -> commit.
+
+    Reservations are made in file order on the calling thread, running ahead while earlier
+    files upload, so the set keeps the files in that order. Each file uploads and commits
+    on one of `jobs` workers as soon as it's reserved. Reserving blocks while too many
+    bytes are in flight (see `inflight_upload_bytes`).
+
+    Args:
+        reserve: reserve(path) -> media, reserved or resumed from the upload journal
+        commit: commit(path, media, checksum) -> committed media
+
+    Returns:
+        list: the committed media, in file order
+    """
+
+    def upload_and_commit(path: str, media: dict, size: int) -> dict:
+        try:
+            try:
+                checksum = upload_media(media=media, media_asset_path=path)
+            except UploadPartRejectedError:
+                # The reservation rejected a part, so it can't be resumed either.
+                # Other failures keep the journal entry, to resume on the next run.
+                discard_upload(path)
+                raise
+            committed = commit(path, media, checksum)
+            discard_upload(path)
+            return committed
+        finally:
+            inflight_upload_bytes.release(size)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        # (future, bytes reserved for it)
+        futures = []
+        try:
+            for path in file_paths:
+                size = os.stat(path).st_size
+                inflight_upload_bytes.acquire(size)
+                try:
+                    media = reserve(path)
+                except BaseException:
+                    inflight_upload_bytes.release(size)
+                    raise
+                futures.append(
+                    (
+                        executor.submit(
+                            bind_output_group(upload_and_commit), path, media, size
+                        ),
+                        size,
+                    )
+                )
+            return [future.result() for future, _ in futures]
+        except BaseException:
+            for future, size in futures:
+                # A cancelled upload never runs, so never releases its bytes
+                if future.cancel():
+                    inflight_upload_bytes.release(size)
+            raise
+
+
+def get_media_file_name(
+    media: dict,
+    file_names: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+):
+    """Gets the filename for screenshot/preview media with `id` prefixes stripped off.
+    Media matched to a renamed asset file (see `match_media_files`) get the asset's name."""
+    if file_names and media["id"] in file_names:
+        return file_names[media["id"]]
+    return media["attributes"]["fileName"].replace(media["id"] + "_", "")
+
+
+def get_media_file_names(
+    media: Sequence[dict],
+    file_names: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+):
+    return [get_media_file_name(x, file_names) for x in media]
+
+
+def get_media_order(
+    media: Sequence[dict],
+    force: bool = False,
+    file_names: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+) -> Optional[list]:  # pylint: disable=unsubscriptable-object
+    """Gets the media ids sorted by file name.
+    Returns None when the media is already in that order, so the reorder can be skipped,
+    unless `force` is set because the order of the media isn't known."""
+    media_ids = [x["id"] for x in media]
+    sorted_ids = [
+        x["id"] for x in sorted(media, key=lambda x: get_media_file_name(x, file_names))
     ]
+    return None if sorted_ids == media_ids and not force else sorted_ids
+
 
+def get_resumable_media(media: Sequence[dict], set_assets: MediaSetAssets) -> dict:
+    """Gets the media whose upload was interrupted, and can resume from the upload journal.
 
-def get_new_file_paths(media: Sequence[dict], asset_dir: str):
-    media_file_names = get_media_file_names(media)
-    asset_file_names = get_asset_file_names(asset_dir)
+    Returns:
+        dict: the resumable media, with their upload operations, by file path
+    """
+    resumable = {}
+    for x in media:
+        asset = set_assets.files.get(get_media_file_name(x))
+        if asset is None or asset.path in set_assets.ignored:
+            continue
+        resumed = get_resumable_upload(asset.path, x)
+        if resumed is not None:
+            resumable[asset.path] = resumed
+    return resumable
+
+
+def get_new_file_paths(
+    media: Sequence[dict],
+    set_assets: MediaSetAssets,
+    file_names: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+):
+    media_file_names = get_media_file_names(media, file_names)
     return [
-        os.path.join(asset_dir, x)
-        for x in asset_file_names
-        if x not in media_file_names
+        asset.path
+        for file_name, asset in set_assets.files.items()
+        if file_name not in media_file_names
     ]
 
 
-def publish_screenshot(
+def match_media_files(media: Sequence[dict], set_assets: MediaSetAssets) -> dict:
+    """Match screenshot/preview media to the asset files in a set.
+
+    Media match the asset file of the same name when its checksum matches. The others
+    match an unmatched asset file by content (`sourceFileChecksum`), so a renamed file
+    only needs a reorder, rather than a delete, re-upload and re-processing. The local
+    file names of the renamed files are recorded for downloads (see `media_names`).
+
+    Returns:
+        dict: the matched asset file name, by media id. Unmatched media are outdated.
+    """
+    asset_file_names = list(set_assets.files.keys())
+    file_names = {}
+    unmatched = []
+    for x in media:
+        file_name = get_media_file_name(x)
+        if file_name in asset_file_names and media_checksum_ok(
+            media=x, set_assets=set_assets
+        ):
+            file_names[x["id"]] = file_name
+        else:
+            unmatched.append(x)
+    if not unmatched:
+        record_local_file_names(media, file_names)
+        return file_names
+
+    # Match the rest by content. Checksums come from the checksum cache.
+    unmatched_file_names = [x for x in asset_file_names if x not in file_names.values()]
+    for x in unmatched:
+        file_name = get_media_file_name(x)
+        appstore_checksum = x["attributes"]["sourceFileChecksum"]
+        renamed = next(
+            (
+                y
+                for y in unmatched_file_names
+                if appstore_checksum is not None
+                and file_checksum(set_assets.files[y].path, set_assets.files[y].stat)
+                == appstore_checksum
+            ),
+            None,
+        )
+        if renamed is not None:
+            print_media_status(
+                file_name,
+                colorama.Fore.CYAN,
+                clr(
+                    "content matched: ",
+                    f"{colorama.Style.DIM}renamed to {renamed}",
+                ),
+            )
+            file_names[x["id"]] = renamed
+            unmatched_file_names.remove(renamed)
+        elif file_name not in asset_file_names:
+            print_media_status(
+                file_name,
+                colorama.Fore.RED,
+                "no source file",
+            )
+    record_local_file_names(media, file_names)
+    return file_names
+
+
+def reserve_screenshot(
     access_token: AccessToken,
     screenshot_path: str,
     screenshot_set_id: str,
-):
+) -> dict:
+    """Create a screenshot asset reservation for the file.
+
+    Returns:
+        dict: the reserved screenshot, with its upload operations
+    """
     if not os.path.isfile(screenshot_path):
         raise FileNotFoundError(f"Screenshot path does not exist: {screenshot_path}")
 
     _, file_name = os.path.split(screenshot_path)
-    file_stat = os.stat(screenshot_path)
-
-    # Create
     print_media_status(
         file_name,
         colorama.Fore.CYAN,
         "reserving asset",
     )
-    screenshot = appstore.create_screenshot(
+    return appstore.create_screenshot(
         screenshot_set_id=screenshot_set_id,
         file_name=file_name,
-        file_size=file_stat.st_size,
+        file_size=os.stat(screenshot_path).st_size,
         access_token=access_token,
     )
-    # Upload
-    checksum = upload_media(media=screenshot, media_asset_path=screenshot_path)
 
-    # Commit
+
+def commit_screenshot(
+    access_token: AccessToken,
+    screenshot_path: str,
+    screenshot: dict,
+    checksum: str,
+) -> dict:
+    """Commit an uploaded screenshot reservation.
+
+    Returns:
+        dict: the committed screenshot
+    """
+    _, file_name = os.path.split(screenshot_path)
     print_media_status(
         file_name,
         colorama.Fore.CYAN,
         "commiting upload",
     )
-    screenshot = appstore.update_screenshot(
+    return appstore.update_screenshot(
         screenshot_id=screenshot["id"],
         uploaded=True,
         sourceFileChecksum=checksum,
@@ -165,53 +508,101 @@ def publish_screenshot(
     )
 
 
+def publish_screenshot(
+    access_token: AccessToken,
+    screenshot_path: str,
+    screenshot_set_id: str,
+) -> dict:
+    """Reserve, upload and commit a screenshot.
+
+    Returns:
+        dict: the committed screenshot
+    """
+    (screenshot,) = publish_media_pipelined(
+        file_paths=[screenshot_path],
+        reserve=lambda path: reserve_screenshot(
+            access_token=access_token,
+            screenshot_path=path,
+            screenshot_set_id=screenshot_set_id,
+        ),
+        commit=lambda path, screenshot, checksum: commit_screenshot(
+            access_token=access_token,
+            screenshot_path=path,
+            screenshot=screenshot,
+            checksum=checksum,
+        ),
+    )
+    return screenshot
+
+
 def publish_screenshots(
     access_token: AccessToken,
-    screenshot_set_dir: str,
+    set_assets: MediaSetAssets,
     screenshot_set_id: str,
     display_type: str,
-    asset_ignore: str = "",
 ):
     print_media_set_status(display_type, colorama.Fore.CYAN, "checking for changes")
 
-    # Delete outdated screenshots
+    # The set is fetched once, then kept in step with the responses of
+    # the delete/create/commit calls below, in server order.
     screenshots = appstore.get_screenshots(
         screenshot_set_id=screenshot_set_id, access_token=access_token
     )
-    for screenshot in screenshots:
-        if not media_checksum_ok(media=screenshot, media_asset_dir=screenshot_set_dir):
+
+    # Interrupted uploads resume below
+    resumable = get_resumable_media(screenshots, set_assets)
+    resumable_ids = [x["id"] for x in resumable.values()]
+    screenshots = [x for x in screenshots if x["id"] not in resumable_ids]
+
+    # Delete outdated screenshots. Renamed files keep their screenshot.
+    file_names = match_media_files(screenshots, set_assets)
+    for screenshot in list(screenshots):
+        if screenshot["id"] not in file_names:
             appstore.delete_screenshot(
                 screenshot_id=screenshot["id"], access_token=access_token
             )
+            screenshots.remove(screenshot)
 
-    # Create new screenshots
-    screenshots = appstore.get_screenshots(
-        screenshot_set_id=screenshot_set_id, access_token=access_token
-    )
-
-    # Publish
-    new_file_paths = get_new_file_paths(screenshots, screenshot_set_dir)
-    for file_path in new_file_paths:
-        if asset_ignore and re.search(asset_ignore, file_path):
+    # Publish new screenshots
+    new_file_paths = []
+    for file_path in get_new_file_paths(screenshots, set_assets, file_names):
+        if file_path in set_assets.ignored:
             print_media_status(
                 file_path,
                 colorama.Fore.CYAN + colorama.Style.DIM,
                 "ignoring",
             )
         else:
-            publish_screenshot(
-                access_token=access_token,
-                screenshot_path=file_path,
-                screenshot_set_id=screenshot_set_id,
-            )
+            new_file_paths.append(file_path)
 
-    # Reorder the screenshots
-    print_media_set_status(display_type, colorama.Fore.CYAN, "sorting screenshots")
-    screenshots = appstore.get_screenshots(
-        screenshot_set_id=screenshot_set_id, access_token=access_token
+    # New screenshots are appended to the end of the set, in reservation order
+    screenshots += publish_media_pipelined(
+        file_paths=new_file_paths,
+        reserve=lambda path: resumable.get(path)
+        or reserve_screenshot(
+            access_token=access_token,
+            screenshot_path=path,
+            screenshot_set_id=screenshot_set_id,
+        ),
+        commit=lambda path, screenshot, checksum: commit_screenshot(
+            access_token=access_token,
+            screenshot_path=path,
+            screenshot=screenshot,
+            checksum=checksum,
+        ),
+    )
+
+    # Reorder the screenshots (resumed uploads kept their place in the set)
+    screenshot_ids = get_media_order(
+        screenshots, force=bool(resumable), file_names=file_names
     )
-    screenshots.sort(key=lambda x: x["attributes"]["fileName"])
-    screenshot_ids = [x["id"] for x in screenshots]
+    if screenshot_ids is None:
+        print_media_set_status(
+            display_type, colorama.Fore.CYAN + colorama.Style.DIM, "order matched"
+        )
+        return
+
+    print_media_set_status(display_type, colorama.Fore.CYAN, "sorting screenshots")
     appstore.update_screenshot_order(
         screenshot_set_id=screenshot_set_id,
         screenshot_ids=screenshot_ids,
@@ -219,36 +610,16 @@ def publish_screenshots(
     )
 
 
-def publish_screenshot_sets(
+def publish_screenshot_set(
     access_token: AccessToken,
-    localization_dir: str,
+    set_assets: Optional[MediaSetAssets],  # pylint: disable=unsubscriptable-object
     localization_id: str,
-    asset_ignore: str = "",
+    display_type: str,
+    screenshot_set: Optional[dict],  # pylint: disable=unsubscriptable-object
 ):
-    """Publish the screenshot sets from assets on disk."""
-    screenshots_dir = os.path.join(localization_dir, "screenshots")
-    if not os.path.isdir(screenshots_dir):
-        print_clr(
-            f"    No screenshots: directory {colorama.Fore.CYAN}{screenshots_dir}{colorama.Fore.RESET} not found.",
-        )
-        return
-
-    screenshot_sets = appstore.get_screenshot_sets(
-        localization_id=localization_id, access_token=access_token
-    )
-
-    asset_display_types = [
-        x
-        for x in os.listdir(screenshots_dir)
-        if os.path.isdir(os.path.join(screenshots_dir, x))
-    ]
-
+    """Reconcile one screenshot display type, creating or deleting its set as needed."""
     # Create new display types
-    loc_display_types = [
-        x["attributes"]["screenshotDisplayType"] for x in screenshot_sets
-    ]
-    new_display_types = [x for x in asset_display_types if x not in loc_display_types]
-    for display_type in new_display_types:
+    if screenshot_set is None:
         print_media_set_status(
             display_type, colorama.Fore.YELLOW, "creating display type"
         )
@@ -257,102 +628,236 @@ def publish_screenshot_sets(
             display_type=display_type,
             access_token=access_token,
         )
-        screenshot_sets.append(screenshot_set)
 
-    for screenshot_set in screenshot_sets:
-        screenshot_set_id = screenshot_set["id"]
-        display_type = screenshot_set["attributes"]["screenshotDisplayType"]
-        screenshot_set_dir = os.path.join(screenshots_dir, display_type)
+    # Delete removed display types
+    if set_assets is None:
+        print_media_set_status(display_type, colorama.Fore.RED, "deleting display type")
+        appstore.delete_screenshot_set(
+            screenshot_set_id=screenshot_set["id"], access_token=access_token
+        )
+        return
+
+    # Publish
+    publish_screenshots(
+        access_token=access_token,
+        set_assets=set_assets,
+        screenshot_set_id=screenshot_set["id"],
+        display_type=display_type,
+    )
 
-        # Delete removed display types
-        if not os.path.isdir(screenshot_set_dir):
+
+def publish_screenshot_sets(
+    access_token: AccessToken,
+    locale_assets: LocaleAssets,
+    localization_id: str,
+    jobs: int = 1,
+    limit: Optional[
+        threading.Semaphore
+    ] = None,  # pylint: disable=unsubscriptable-object
+    published: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+) -> Optional[dict]:  # pylint: disable=unsubscriptable-object
+    """Publish the screenshot sets from assets on disk.
+    Display types are reconciled concurrently, sharing the `limit` on running set tasks.
+
+    Display types whose fingerprint matches the `published` manifest are skipped.
+
+    Returns:
+        dict: the display type fingerprints to record in the manifest
+    """
+    asset_sets = locale_assets.screenshot_sets
+    if asset_sets is None:
+        screenshots_dir = os.path.join(locale_assets.path, "screenshots")
+        print_clr(
+            f"    No screenshots: directory {colorama.Fore.CYAN}{screenshots_dir}{colorama.Fore.RESET} not found.",
+        )
+        return None
+
+    fingerprints = get_set_fingerprints(asset_sets)
+    if published == fingerprints:
+        print_clr(
+            f"    {colorama.Fore.CYAN}{colorama.Style.DIM}Screenshots unchanged since the last publish."
+        )
+        return fingerprints
+    published = published or {}
+
+    screenshot_sets = appstore.get_screenshot_sets(
+        localization_id=localization_id, access_token=access_token
+    )
+
+    # Existing display types, then new ones
+    display_type_sets = {
+        x["attributes"]["screenshotDisplayType"]: x for x in screenshot_sets
+    }
+    for display_type in asset_sets:
+        display_type_sets.setdefault(display_type, None)
+
+    # Skip display types unchanged since the last publish
+    for display_type, screenshot_set in list(display_type_sets.items()):
+        if screenshot_set is not None and published.get(
+            display_type
+        ) == fingerprints.get(display_type, False):
             print_media_set_status(
-                display_type, colorama.Fore.RED, "deleting display type"
+                display_type,
+                colorama.Fore.CYAN + colorama.Style.DIM,
+                "unchanged since the last publish",
             )
-            appstore.delete_screenshot_set(
-                screenshot_set_id=screenshot_set_id, access_token=access_token
+            del display_type_sets[display_type]
+
+    run_concurrently(
+        tasks=[
+            functools.partial(
+                publish_screenshot_set,
+                access_token=access_token,
+                set_assets=asset_sets.get(display_type),
+                localization_id=localization_id,
+                display_type=display_type,
+                screenshot_set=screenshot_set,
             )
-            continue
+            for display_type, screenshot_set in display_type_sets.items()
+        ],
+        jobs=jobs,
+        limit=limit,
+    )
+    return fingerprints
 
-        # Publish
-        publish_screenshots(
-            access_token=access_token,
-            screenshot_set_dir=screenshot_set_dir,
-            screenshot_set_id=screenshot_set_id,
-            display_type=display_type,
-            asset_ignore=asset_ignore,
-        )
 
+def parse_preview_attributes(
+    attributes_json: Optional[str],  # pylint: disable=unsubscriptable-object
+) -> dict:
+    """Parse the contents of a preview attributes file. A missing file reads as defaults."""
+    attributes = {"previewFrameTimeCode": ""}
+    if attributes_json is not None:
+        attributes = {**attributes, **json.loads(attributes_json)}
+    return attributes
 
-def publish_preview(
+
+def read_preview_attributes(attributes_path: str) -> dict:
+    """Read a preview attributes file. A missing (or unset) file reads as defaults."""
+    return parse_preview_attributes(
+        read_txt_file(attributes_path) if attributes_path else None
+    )
+
+
+def reserve_preview(
     access_token: AccessToken,
     preview_path: str,
-    attributes_path: str,
+    attributes: dict,
     preview_set_id: str,
-):
+) -> dict:
+    """Create a preview asset reservation for the file, with its attributes.
+
+    Returns:
+        dict: the reserved preview, with its upload operations
+    """
     if not os.path.isfile(preview_path):
         raise FileNotFoundError(f"Preview path does not exist: {preview_path}")
 
     _, file_name = os.path.split(preview_path)
-    file_stat = os.stat(preview_path)
-
-    # Attributes file
-    attributes = {"previewFrameTimeCode": ""}
-    if os.path.isfile(attributes_path):
-        attributes_json = read_txt_file(attributes_path)
-        attributes = {**attributes, **json.loads(attributes_json)}
-
-    # Create
     print_media_status(
         file_name,
         colorama.Fore.CYAN,
         "reserving asset",
     )
-    preview = appstore.create_preview(
+    return appstore.create_preview(
         preview_set_id=preview_set_id,
         file_name=file_name,
-        file_size=file_stat.st_size,
+        file_size=os.stat(preview_path).st_size,
         access_token=access_token,
+        preview_frame_time_code=attributes["previewFrameTimeCode"],
     )
-    # Upload
-    checksum = upload_media(media=preview, media_asset_path=preview_path)
 
-    # Commit
+
+def commit_preview(
+    access_token: AccessToken,
+    preview_path: str,
+    attributes: dict,
+    preview: dict,
+    checksum: str,
+) -> dict:
+    """Commit an uploaded preview reservation, with its attributes.
+
+    Returns:
+        dict: the committed preview
+    """
+    _, file_name = os.path.split(preview_path)
     print_media_status(
         file_name,
         colorama.Fore.CYAN,
         "commiting upload",
     )
-    appstore.update_preview(
+    return appstore.update_preview(
         preview_id=preview["id"],
         access_token=access_token,
         uploaded=True,
         source_file_checksum=checksum,
+        preview_frame_time_code=attributes["previewFrameTimeCode"],
     )
 
 
-def publish_preview_attributes(
+def publish_preview(
     access_token: AccessToken,
     preview_path: str,
     attributes_path: str,
+    preview_set_id: str,
+) -> dict:
+    """Reserve, upload and commit a preview.
+    The attributes file is sent with the reservation and the commit, so a new preview
+    never has to wait for processing to get its attributes.
+
+    Returns:
+        dict: the committed preview
+    """
+    attributes = read_preview_attributes(attributes_path)
+    (preview,) = publish_media_pipelined(
+        file_paths=[preview_path],
+        reserve=lambda path: reserve_preview(
+            access_token=access_token,
+            preview_path=path,
+            attributes=attributes,
+            preview_set_id=preview_set_id,
+        ),
+        commit=lambda path, preview, checksum: commit_preview(
+            access_token=access_token,
+            preview_path=path,
+            attributes=attributes,
+            preview=preview,
+            checksum=checksum,
+        ),
+    )
+    return preview
+
+
+def get_preview_time_code(
+    attributes_json: Optional[str],  # pylint: disable=unsubscriptable-object
+) -> str:
+    """Gets the `previewFrameTimeCode` from a preview attributes file's contents,
+    or "" if it isn't set."""
+    return parse_preview_attributes(attributes_json)["previewFrameTimeCode"] or ""
+
+
+def publish_preview_attributes(
+    access_token: AccessToken,
+    attributes_path: str,
+    attributes_json: Optional[str],  # pylint: disable=unsubscriptable-object
     preview: dict,
-    timeout_secs: float,
-):
-    _, file_name = os.path.split(preview_path)
+) -> dict:
+    """Set the preview attributes from its attributes file, if the preview has processed.
+
+    Returns:
+        dict: the preview, as last seen from the appstore
+    """
     _, attributes_file_name = os.path.split(attributes_path)
 
     # Attributes file
-    attributes = {}
-    if not os.path.isfile(attributes_path):
+    if attributes_json is None:
         # Nothing to update
         print_media_status(
             attributes_file_name,
             colorama.Fore.CYAN + colorama.Style.DIM,
             "attributes file not provided",
         )
-        return
+        return preview
 
-    attributes_json = read_txt_file(attributes_path)
     attributes = json.loads(attributes_json)
 
     if (
@@ -367,27 +872,7 @@ def publish_preview_attributes(
             colorama.Fore.CYAN + colorama.Style.DIM,
             "attributes matched",
         )
-        return
-
-    # Wait for upload completion
-    backoff_secs = 2.0
-    completion_secs = 0.0
-    while (
-        completion_secs < timeout_secs
-        and preview["attributes"]["assetDeliveryState"]["state"]
-        == appstore.MediaAssetState.UPLOAD_COMPLETE.name
-    ):
-        print_media_status(
-            file_name,
-            colorama.Fore.CYAN,
-            f"{completion_secs:.0f}s - waiting for upload completion...",
-        )
-        time.sleep(backoff_secs)
-        completion_secs += backoff_secs
-        backoff_secs *= 1.5
-        preview = appstore.get_preview(
-            preview_id=preview["id"], access_token=access_token
-        )
+        return preview
 
     if (
         preview["attributes"]["assetDeliveryState"]["state"]
@@ -404,112 +889,161 @@ def publish_preview_attributes(
             access_token=access_token,
             preview_frame_time_code=attributes["previewFrameTimeCode"],
         )
+    else:
+        print_media_status(
+            attributes_file_name,
+            colorama.Fore.YELLOW,
+            "attributes pending: preview still processing",
+        )
+    return preview
 
 
 def publish_previews(
     access_token: AccessToken,
-    preview_set_dir: str,
+    set_assets: MediaSetAssets,
     preview_set_id: str,
     display_type: str,
-    completion_timeout_secs: float,
-    asset_ignore: str = "",
-):
+    waiter: MediaProcessingWaiter,
+) -> bool:
+    """Publish the previews in a set from assets on disk.
+    Previews that need new attributes are waited on together, using the shared `waiter`.
+
+    Returns:
+        bool: False if some preview attributes are still waiting on preview processing
+    """
     print_media_set_status(display_type, colorama.Fore.CYAN, "checking for changes")
 
-    # Delete outdated previews
+    # The set is fetched once, then kept in step with the responses of
+    # the delete/create/commit/update calls below, in server order.
     previews = appstore.get_previews(
         preview_set_id=preview_set_id, access_token=access_token
     )
-    for preview in previews:
-        if not media_checksum_ok(media=preview, media_asset_dir=preview_set_dir):
+
+    # Interrupted uploads resume below
+    resumable = get_resumable_media(previews, set_assets)
+    resumable_ids = [x["id"] for x in resumable.values()]
+    previews = [x for x in previews if x["id"] not in resumable_ids]
+
+    # Delete outdated previews. Renamed files keep their preview.
+    file_names = match_media_files(previews, set_assets)
+    for preview in list(previews):
+        if preview["id"] not in file_names:
             appstore.delete_preview(preview_id=preview["id"], access_token=access_token)
+            previews.remove(preview)
 
-    # Publish new previews
-    previews = appstore.get_previews(
-        preview_set_id=preview_set_id, access_token=access_token
-    )
-    new_file_paths = get_new_file_paths(previews, preview_set_dir)
-    for file_path in new_file_paths:
-        if asset_ignore and re.search(asset_ignore, file_path):
+    # Publish new previews, with their attributes
+    existing_count = len(previews)
+    new_file_paths = []
+    for file_path in get_new_file_paths(previews, set_assets, file_names):
+        if file_path in set_assets.ignored:
             print_media_status(
                 file_path,
                 colorama.Fore.CYAN + colorama.Style.DIM,
                 "ignoring",
             )
         else:
-            attributes_path = get_attributes_file_path(file_path)
-            publish_preview(
-                access_token=access_token,
-                preview_path=file_path,
-                attributes_path=attributes_path,
-                preview_set_id=preview_set_id,
-            )
+            new_file_paths.append(file_path)
 
-    # Update preview attributes
-    previews = appstore.get_previews(
-        preview_set_id=preview_set_id, access_token=access_token
+    def get_attributes(path: str) -> dict:
+        return parse_preview_attributes(
+            set_assets.attributes.get(os.path.basename(path))
+        )
+
+    # New previews are appended to the end of the set, in reservation order
+    previews += publish_media_pipelined(
+        file_paths=new_file_paths,
+        reserve=lambda path: resumable.get(path)
+        or reserve_preview(
+            access_token=access_token,
+            preview_path=path,
+            attributes=get_attributes(path),
+            preview_set_id=preview_set_id,
+        ),
+        commit=lambda path, preview, checksum: commit_preview(
+            access_token=access_token,
+            preview_path=path,
+            attributes=get_attributes(path),
+            preview=preview,
+            checksum=checksum,
+        ),
     )
-    for preview in previews:
-        file_path = os.path.join(preview_set_dir, get_media_file_name(preview))
-        attributes_path = get_attributes_file_path(file_path)
-        if asset_ignore and re.search(asset_ignore, attributes_path):
+
+    # Wait for the existing previews needing new attributes to finish processing
+    attributes_jsons = [
+        set_assets.attributes.get(get_media_file_name(preview, file_names))
+        for preview in previews[:existing_count]
+    ]
+    waiting = [
+        preview
+        for preview, attributes_json in zip(previews, attributes_jsons)
+        if get_preview_time_code(attributes_json)
+        not in ("", preview["attributes"]["previewFrameTimeCode"])
+        and is_processing(preview)
+    ]
+    if waiting:
+        processed = waiter.wait(kind="previews", set_id=preview_set_id, media=waiting)
+        processed = {x["id"]: x for x in processed}
+        previews = [processed.get(x["id"], x) for x in previews]
+
+    # Update existing preview attributes
+    complete = True
+    for index, preview in enumerate(previews[:existing_count]):
+        attributes_path = get_attributes_file_path(
+            os.path.join(set_assets.path, get_media_file_name(preview, file_names))
+        )
+        if attributes_path in set_assets.ignored:
             print_media_status(
                 attributes_path,
                 colorama.Fore.CYAN + colorama.Style.DIM,
                 "ignoring",
             )
         else:
-            publish_preview_attributes(
+            previews[index] = publish_preview_attributes(
                 access_token=access_token,
-                preview_path=file_path,
                 attributes_path=attributes_path,
+                attributes_json=attributes_jsons[index],
                 preview=preview,
-                timeout_secs=completion_timeout_secs,
             )
+            time_code = get_preview_time_code(attributes_jsons[index])
+            if time_code and (
+                time_code != previews[index]["attributes"]["previewFrameTimeCode"]
+            ):
+                complete = False
+
+    # Reorder the previews (resumed uploads kept their place in the set)
+    preview_ids = get_media_order(
+        previews, force=bool(resumable), file_names=file_names
+    )
+    if preview_ids is None:
+        print_media_set_status(
+            display_type, colorama.Fore.CYAN + colorama.Style.DIM, "order matched"
+        )
+        return complete
 
-    # Reorder the previews
     print_media_set_status(display_type, colorama.Fore.CYAN, "sorting previews")
-    previews = appstore.get_previews(
-        preview_set_id=preview_set_id, access_token=access_token
-    )
-    previews.sort(key=lambda x: x["attributes"]["fileName"])
-    preview_ids = [x["id"] for x in previews]
     appstore.update_preview_order(
         preview_set_id=preview_set_id,
         preview_ids=preview_ids,
         access_token=access_token,
     )
+    return complete
 
 
-def publish_preview_sets(
+def publish_preview_set(
     access_token: AccessToken,
-    localization_dir: str,
+    set_assets: Optional[MediaSetAssets],  # pylint: disable=unsubscriptable-object
     localization_id: str,
-    completion_timeout_secs: float,
-    asset_ignore: str = "",
-):
-    """Publish the previews sets from assets on disk."""
-    previews_dir = os.path.join(localization_dir, "previews")
-    if not os.path.isdir(previews_dir):
-        print_clr(
-            f"    No previews: directory {colorama.Fore.CYAN}{previews_dir}{colorama.Fore.RESET} not found.",
-        )
-        return
+    preview_type: str,
+    preview_set: Optional[dict],  # pylint: disable=unsubscriptable-object
+    waiter: MediaProcessingWaiter,
+) -> bool:
+    """Reconcile one preview type, creating or deleting its set as needed.
 
-    preview_sets = appstore.get_preview_sets(
-        localization_id=localization_id, access_token=access_token
-    )
-
-    asset_display_types = [
-        x
-        for x in os.listdir(previews_dir)
-        if os.path.isdir(os.path.join(previews_dir, x))
-    ]
-
-    # Create new display types
-    loc_preview_types = [x["attributes"]["previewType"] for x in preview_sets]
-    new_preview_types = [x for x in asset_display_types if x not in loc_preview_types]
-    for preview_type in new_preview_types:
+    Returns:
+        bool: False if some preview attributes are still waiting on preview processing
+    """
+    # Create new preview types
+    if preview_set is None:
         print_media_set_status(
             preview_type, colorama.Fore.YELLOW, "creating preview type"
         )
@@ -518,54 +1052,226 @@ def publish_preview_sets(
             preview_type=preview_type,
             access_token=access_token,
         )
-        preview_sets.append(preview_set)
 
-    for preview_set in preview_sets:
-        preview_set_id = preview_set["id"]
-        preview_type = preview_set["attributes"]["previewType"]
-        preview_set_dir = os.path.join(previews_dir, preview_type)
+    # Delete removed preview types
+    if set_assets is None:
+        print_media_set_status(preview_type, colorama.Fore.RED, "deleting preview type")
+        appstore.delete_preview_set(
+            preview_set_id=preview_set["id"], access_token=access_token
+        )
+        return True
+
+    # Publish
+    return publish_previews(
+        access_token=access_token,
+        set_assets=set_assets,
+        preview_set_id=preview_set["id"],
+        display_type=preview_type,
+        waiter=waiter,
+    )
+
+
+def publish_preview_sets(
+    access_token: AccessToken,
+    locale_assets: LocaleAssets,
+    localization_id: str,
+    waiter: MediaProcessingWaiter,
+    jobs: int = 1,
+    limit: Optional[
+        threading.Semaphore
+    ] = None,  # pylint: disable=unsubscriptable-object
+    published: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+) -> Optional[dict]:  # pylint: disable=unsubscriptable-object
+    """Publish the previews sets from assets on disk.
+    Preview types are reconciled concurrently, sharing the `limit` on running set tasks.
+
+    Preview types whose fingerprint matches the `published` manifest are skipped.
+
+    Returns:
+        dict: the preview type fingerprints to record in the manifest
+    """
+    asset_sets = locale_assets.preview_sets
+    if asset_sets is None:
+        previews_dir = os.path.join(locale_assets.path, "previews")
+        print_clr(
+            f"    No previews: directory {colorama.Fore.CYAN}{previews_dir}{colorama.Fore.RESET} not found.",
+        )
+        return None
+
+    fingerprints = get_set_fingerprints(asset_sets)
+    if published == fingerprints:
+        print_clr(
+            f"    {colorama.Fore.CYAN}{colorama.Style.DIM}Previews unchanged since the last publish."
+        )
+        return fingerprints
+    published = published or {}
+
+    preview_sets = appstore.get_preview_sets(
+        localization_id=localization_id, access_token=access_token
+    )
+
+    # Existing preview types, then new ones
+    preview_type_sets = {x["attributes"]["previewType"]: x for x in preview_sets}
+    for preview_type in asset_sets:
+        preview_type_sets.setdefault(preview_type, None)
 
-        # Delete removed display types
-        if not os.path.isdir(preview_set_dir):
+    # Skip preview types unchanged since the last publish
+    for preview_type, preview_set in list(preview_type_sets.items()):
+        if preview_set is not None and published.get(preview_type) == fingerprints.get(
+            preview_type, False
+        ):
             print_media_set_status(
-                preview_type, colorama.Fore.RED, "deleting preview type"
+                preview_type,
+                colorama.Fore.CYAN + colorama.Style.DIM,
+                "unchanged since the last publish",
             )
-            appstore.delete_preview_set(
-                preview_set_id=preview_set_id, access_token=access_token
+            del preview_type_sets[preview_type]
+
+    completed = run_concurrently(
+        tasks=[
+            functools.partial(
+                publish_preview_set,
+                access_token=access_token,
+                set_assets=asset_sets.get(preview_type),
+                localization_id=localization_id,
+                preview_type=preview_type,
+                preview_set=preview_set,
+                waiter=waiter,
             )
-            continue
+            for preview_type, preview_set in preview_type_sets.items()
+        ],
+        jobs=jobs,
+        limit=limit,
+    )
 
-        # Publish
-        publish_previews(
+    # Types still waiting on preview processing are checked again next time
+    for preview_type, complete in zip(preview_type_sets.keys(), completed):
+        if not complete:
+            fingerprints.pop(preview_type, None)
+    return fingerprints
+
+
+def publish_version_localization(
+    access_token: AccessToken,
+    assets: AssetIndex,
+    localization: dict,
+    waiter: MediaProcessingWaiter,
+    allow_delete_locale: bool = True,
+    jobs: int = 1,
+    limit: Optional[
+        threading.Semaphore
+    ] = None,  # pylint: disable=unsubscriptable-object
+    published: Optional[dict] = None,  # pylint: disable=unsubscriptable-object
+) -> Optional[dict]:  # pylint: disable=unsubscriptable-object
+    """Publish the text attributes, screenshots and previews of one version localization.
+    The screenshot and preview sets are reconciled concurrently with up to `jobs` workers.
+
+    Media sets unchanged since the `published` manifest entry are skipped.
+
+    Returns:
+        dict: the manifest entry for the locale, or None if it was deleted
+    """
+    loc_id = localization["id"]
+    loc_attr = localization["attributes"]
+    locale = loc_attr["locale"]
+    locale_assets = assets.locales.get(locale)
+
+    # Delete removed locales
+    if locale_assets is None:
+        if allow_delete_locale:
+            print_locale_status(locale, colorama.Fore.RED, "deleting locale")
+            appstore.delete_version_localization(
+                localization_id=loc_id, access_token=access_token
+            )
+        else:
+            print_locale_status(
+                locale, colorama.Fore.LIGHTBLACK_EX, "locale deletion not allowed"
+            )
+        return None
+
+    # A manifest entry for another localization with the same locale doesn't apply
+    if published is None or published.get("id") != loc_id:
+        published = {}
+
+    # Load local data from disk
+    asset_loc_data: appstore.VersionLocalizationAttributes = read_localization_assets(
+        locale_assets=locale_assets,
+        keys=list(appstore.VersionLocalizationAttributes.__annotations__.keys()),
+    )  # type: ignore
+
+    # Only need to update if there are differences
+    loc_diff_keys = get_changed_keys(asset_loc_data, loc_attr)
+    if len(loc_diff_keys) > 0:
+        print_locale_status(
+            locale,
+            colorama.Fore.CYAN,
+            f"updating locale {colorama.Fore.CYAN}{colorama.Style.DIM}{loc_diff_keys}",
+        )
+        appstore.update_version_localization(
+            localization_id=loc_id,
+            localization_attributes=asset_loc_data,
             access_token=access_token,
-            preview_set_dir=preview_set_dir,
-            preview_set_id=preview_set_id,
-            display_type=preview_type,
-            completion_timeout_secs=completion_timeout_secs,
-            asset_ignore=asset_ignore,
         )
+    else:
+        print_locale_status(
+            locale, colorama.Fore.CYAN, "no changes in version settings"
+        )
+
+    # Screenshots and Previews
+    screenshot_sets, preview_sets = run_concurrently(
+        tasks=[
+            functools.partial(
+                publish_screenshot_sets,
+                access_token=access_token,
+                locale_assets=locale_assets,
+                localization_id=loc_id,
+                jobs=jobs,
+                limit=limit,
+                published=published.get("screenshotSets"),
+            ),
+            functools.partial(
+                publish_preview_sets,
+                access_token=access_token,
+                locale_assets=locale_assets,
+                localization_id=loc_id,
+                waiter=waiter,
+                jobs=jobs,
+                limit=limit,
+                published=published.get("previewSets"),
+            ),
+        ],
+        jobs=jobs,
+    )
+    return {
+        "id": loc_id,
+        "screenshotSets": screenshot_sets,
+        "previewSets": preview_sets,
+    }
 
 
 def publish_version_localizations(
     access_token: AccessToken,
-    app_dir: str,
+    assets: AssetIndex,
     version_id: str,
-    media_completion_timeout_secs: float,
-    asset_ignore: str = "",
+    waiter: MediaProcessingWaiter,
     allow_create_locale: bool = True,
     allow_delete_locale: bool = True,
+    jobs: int = 1,
+    verify: bool = False,
 ):
+    """Publish the version localizations, processing up to `jobs` locales concurrently.
+
+    Media sets whose assets are unchanged since the last successful publish to this version
+    are skipped, unless `verify` is set. The manifest is rewritten once every locale succeeds."""
+    manifest = {} if verify else read_publish_manifest(version_id)
+
     localizations = appstore.get_version_localizations(
         version_id=version_id, access_token=access_token
     )
 
-    asset_locales = [
-        x for x in os.listdir(app_dir) if os.path.isdir(os.path.join(app_dir, x))
-    ]
-
     # create new localizations
     version_locales = [loc["attributes"]["locale"] for loc in localizations]
-    new_locales = [x for x in asset_locales if x not in version_locales]
+    new_locales = [x for x in assets.locales if x not in version_locales]
     if allow_create_locale:
         for locale in new_locales:
             print_locale_status(locale, colorama.Fore.YELLOW, "creating locale")
@@ -582,99 +1288,50 @@ def publish_version_localizations(
                 locale, colorama.Fore.LIGHTBLACK_EX, "locale creation not allowed"
             )
 
-    # publish localizations
-    for loc in localizations:
-        loc_id = loc["id"]
-        loc_attr = loc["attributes"]
-        locale = loc_attr["locale"]
-        loc_dir = os.path.join(app_dir, locale)
-
-        # Delete removed locales
-        if not os.path.isdir(loc_dir):
-            if allow_delete_locale:
-                print_locale_status(locale, colorama.Fore.RED, "deleting locale")
-                appstore.delete_version_localization(
-                    localization_id=loc_id, access_token=access_token
-                )
-            else:
-                print_locale_status(
-                    locale, colorama.Fore.LIGHTBLACK_EX, "locale deletion not allowed"
-                )
-            continue
-
-        # Normalize all attribute values to strings
-        for key in appstore.VersionLocalizationAttributes.__annotations__.keys():
-            if loc_attr[key] is None:
-                loc_attr[key] = ""
-
-        # Load local data from disk
-        asset_loc_data: appstore.VersionLocalizationAttributes = {}
-        for key in appstore.VersionLocalizationAttributes.__annotations__.keys():
-            path = os.path.join(loc_dir, key + ".txt")
-            if asset_ignore and re.search(asset_ignore, path):
-                print_locale_status(
-                    locale,
-                    colorama.Fore.CYAN,
-                    f"ignoring {colorama.Fore.CYAN}{colorama.Style.DIM}{path}",
-                )
-            else:
-                content = read_txt_file(path)
-                if content is not None:
-                    asset_loc_data[key] = content  # type: ignore
-
-        # Only need to update if there are differences
-        loc_diff_keys = [
-            key
-            for key, value in asset_loc_data.items()
-            if value is not None and value != loc_attr[key]
-        ]
-        if len(loc_diff_keys) > 0:
-            print_locale_status(
-                locale,
-                colorama.Fore.CYAN,
-                f"updating locale {colorama.Fore.CYAN}{colorama.Style.DIM}{loc_diff_keys}",
-            )
-            appstore.update_version_localization(
-                localization_id=loc_id,
-                localization_attributes=asset_loc_data,
+    # publish localizations, limiting the set tasks running across all locales
+    limit = threading.BoundedSemaphore(jobs)
+    published = run_concurrently(
+        tasks=[
+            functools.partial(
+                publish_version_localization,
                 access_token=access_token,
+                assets=assets,
+                localization=loc,
+                waiter=waiter,
+                allow_delete_locale=allow_delete_locale,
+                jobs=jobs,
+                limit=limit,
+                published=manifest.get(loc["attributes"]["locale"]),
             )
-        else:
-            print_locale_status(
-                locale, colorama.Fore.CYAN, "no changes in version settings"
-            )
-
-        # Screenshots
-        publish_screenshot_sets(
-            access_token=access_token,
-            localization_dir=loc_dir,
-            localization_id=loc_id,
-            asset_ignore=asset_ignore,
-        )
+            for loc in localizations
+        ],
+        jobs=jobs,
+    )
 
-        # Previews
-        publish_preview_sets(
-            access_token=access_token,
-            localization_dir=loc_dir,
-            localization_id=loc_id,
-            completion_timeout_secs=media_completion_timeout_secs,
-            asset_ignore=asset_ignore,
-        )
+    write_publish_manifest(
+        version_id,
+        {
+            loc["attributes"]["locale"]: entry
+            for loc, entry in zip(localizations, published)
+            if entry is not None
+        },
+    )
 
 
 def publish_version(
     access_token: AccessToken,
-    app_dir: str,
+    assets: AssetIndex,
     app_id: str,
     bundle_id: str,
     platform: Union[appstore.Platform, str],  # pylint: disable=unsubscriptable-object
     version_string: str,
     update_version_string: bool,
     media_completion_timeout_secs: float,
-    asset_ignore: str = "",
     allow_create_version: bool = True,
     allow_create_locale: bool = True,
     allow_delete_locale: bool = True,
+    jobs: int = 1,
+    verify: bool = False,
 ):
     # Get Versions
     versions = appstore.get_versions(
@@ -682,6 +1339,7 @@ def publish_version(
         access_token=access_token,
         platforms=[platform],
         states=appstore.editable_version_states,
+        fields=["versionString"],
     )
     print_clr(
         f"Found {colorama.Fore.CYAN}{len(versions)}{colorama.Fore.RESET} editable app versions ",
@@ -720,6 +1378,11 @@ def publish_version(
                 access_token=access_token,
             )
 
+    # Preview processing is waited on with one deadline for the whole publish
+    waiter = MediaProcessingWaiter(
+        access_token=access_token, timeout_secs=media_completion_timeout_secs
+    )
+
     for v in versions:
         version_id = v["id"]
         version_state = v["attributes"]["appStoreState"]
@@ -731,37 +1394,34 @@ def publish_version(
         )
         publish_version_localizations(
             access_token=access_token,
-            app_dir=app_dir,
+            assets=assets,
             version_id=version_id,
-            media_completion_timeout_secs=media_completion_timeout_secs,
-            asset_ignore=asset_ignore,
+            waiter=waiter,
             allow_create_locale=allow_create_locale,
             allow_delete_locale=allow_delete_locale,
+            jobs=jobs,
+            verify=verify,
         )
 
 
 def publish_info(
     access_token: AccessToken,
-    app_dir: str,
+    assets: AssetIndex,
     app_id: str,
     bundle_id: str,
     platform: Union[appstore.Platform, str],  # pylint: disable=unsubscriptable-object
-    asset_ignore: str = "",
 ):
     # Get Infos
     infos = appstore.get_infos(
         app_id=app_id,
         access_token=access_token,
         states=appstore.editable_version_states,
+        fields=["appStoreState"],
     )
     print_clr(
         f"Found {colorama.Fore.CYAN}{len(infos)}{colorama.Fore.RESET} editable app infos."
     )
 
-    asset_locales = [
-        x for x in os.listdir(app_dir) if os.path.isdir(os.path.join(app_dir, x))
-    ]
-
     for info in infos:
         info_id = info["id"]
         version_state = info["attributes"]["appStoreState"]
@@ -778,7 +1438,7 @@ def publish_info(
 
         # create new localizations
         info_locales = [loc["attributes"]["locale"] for loc in localizations]
-        new_locales = [x for x in asset_locales if x not in info_locales]
+        new_locales = [x for x in assets.locales if x not in info_locales]
         for locale in new_locales:
             print_locale_status(
                 locale, colorama.Fore.LIGHTBLACK_EX, "locale creation not allowed"
@@ -788,41 +1448,27 @@ def publish_info(
             loc_id = loc["id"]
             loc_attr = loc["attributes"]
             locale = loc_attr["locale"]
-            loc_dir = os.path.join(app_dir, locale)
+            locale_assets = assets.locales.get(locale)
 
             # Delete removed locales
-            if not os.path.isdir(loc_dir):
+            if locale_assets is None:
                 print_locale_status(
                     locale, colorama.Fore.LIGHTBLACK_EX, "locale deletion not allowed"
                 )
                 continue
 
-            # Normalize all attribute values to strings
-            for key in appstore.InfoLocalizationAttributes.__annotations__.keys():
-                if loc_attr[key] is None:
-                    loc_attr[key] = ""
-
             # Load local data from disk
-            asset_loc_data: appstore.InfoLocalizationAttributes = {}
-            for key in appstore.InfoLocalizationAttributes.__annotations__.keys():
-                path = os.path.join(loc_dir, key + ".txt")
-                if asset_ignore and re.search(asset_ignore, path):
-                    print_locale_status(
-                        locale,
-                        colorama.Fore.CYAN,
-                        f"ignoring {colorama.Fore.CYAN}{colorama.Style.DIM}{path}",
-                    )
-                else:
-                    content = read_txt_file(path)
-                    if content is not None:
-                        asset_loc_data[key] = content  # type: ignore
+            asset_loc_data: appstore.InfoLocalizationAttributes = (
+                read_localization_assets(
+                    locale_assets=locale_assets,
+                    keys=list(
+                        appstore.InfoLocalizationAttributes.__annotations__.keys()
+                    ),
+                )
+            )  # type: ignore
 
             # Only need to update if there are differences
-            loc_diff_keys = [
-                key
-                for key, value in asset_loc_data.items()
-                if value is not None and value != loc_attr[key]
-            ]
+            loc_diff_keys = get_changed_keys(asset_loc_data, loc_attr)
             if len(loc_diff_keys) > 0:
                 print_locale_status(
                     locale,
@@ -853,9 +1499,15 @@ def publish(
     allow_create_version: bool = True,
     allow_create_locale: bool = True,
     allow_delete_locale: bool = True,
+    jobs: int = 1,
+    verify: bool = False,
 ):
     """Publish all the app meta data to the app store, using any editable app versions found.
-    If none are found, a new version can be created for the specified target platform."""
+    If none are found, a new version can be created for the specified target platform.
+    Up to `jobs` locales are published concurrently.
+
+    Screenshot and preview sets unchanged since the last successful publish are skipped.
+    Use `verify` to check every set against the appstore."""
     print_clr("Publishing assets from directory: ", colorama.Fore.CYAN + asset_dir)
 
     # Application directory
@@ -864,27 +1516,31 @@ def publish(
         raise FileNotFoundError(
             f"App directory {colorama.Fore.CYAN}{app_dir}{colorama.Fore.RESET} not found. "
         )
+    assets = scan_assets(app_dir, asset_ignore)
 
-    publish_version(
-        access_token=access_token,
-        app_dir=app_dir,
-        app_id=app_id,
-        bundle_id=bundle_id,
-        platform=platform,
-        version_string=version_string,
-        update_version_string=update_version_string,
-        media_completion_timeout_secs=media_completion_timeout_secs,
-        asset_ignore=asset_ignore,
-        allow_create_version=allow_create_version,
-        allow_create_locale=allow_create_locale,
-        allow_delete_locale=allow_delete_locale,
-    )
-    publish_info(
-        access_token=access_token,
-        app_dir=app_dir,
-        app_id=app_id,
-        bundle_id=bundle_id,
-        platform=platform,
-        asset_ignore=asset_ignore,
-    )
+    try:
+        publish_version(
+            access_token=access_token,
+            assets=assets,
+            app_id=app_id,
+            bundle_id=bundle_id,
+            platform=platform,
+            version_string=version_string,
+            update_version_string=update_version_string,
+            media_completion_timeout_secs=media_completion_timeout_secs,
+            allow_create_version=allow_create_version,
+            allow_create_locale=allow_create_locale,
+            allow_delete_locale=allow_delete_locale,
+            jobs=jobs,
+            verify=verify,
+        )
+        publish_info(
+            access_token=access_token,
+            assets=assets,
+            app_id=app_id,
+            bundle_id=bundle_id,
+            platform=platform,
+        )
+    finally:
+        save_checksum_cache()
     print_clr(colorama.Fore.GREEN + "Publish complete")
@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+from typing import Optional
+from appstore_tools import appstore
+from appstore_tools.cache_util import read_json_cache, write_json_cache
+
+from .util import file_checksum
+
+UPLOAD_JOURNAL_CACHE_NAME = "upload_journal.json"
+
+# The journal records the uploads in progress, by absolute file path:
+#   {"/path/to/en-US/previews/IPHONE_65/1.mp4": {
+#       "mediaId": "<screenshot/preview id>", "checksum": "<file md5>", "time": 1600000000.0,
+#       "uploadOperations": [...], "uploaded": [<offsets of the parts uploaded>]}}
+# An entry is written when a reservation starts uploading, updated after every part, and
+# removed once the reservation is committed. The md5 of the uploaded parts isn't kept,
+# since hashlib can't serialize its state: a resumed upload re-hashes the file from disk.
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def _load() -> dict:
+    global _journal
+    if _journal is None:
+        _journal = read_json_cache(UPLOAD_JOURNAL_CACHE_NAME)
+    return _journal
+
+
+def _save() -> None:
+    write_json_cache(UPLOAD_JOURNAL_CACHE_NAME, _journal)
+
+
+def get_resumable_upload(
+    path: str, media: dict
+) -> Optional[dict]:  # pylint: disable=unsubscriptable-object
+    """Gets the journaled reservation of an interrupted upload of the file, if it can resume.
+
+    The appstore media must still be awaiting upload, and the file unchanged since the
+    upload started. A journal entry for the file that can't resume is dropped.
+
+    Returns:
+        dict: the media, with the journaled upload operations
+    """
+    key = os.path.abspath(path)
+    with _journal_lock:
+        entry = _load().get(key)
+    if entry is None:
+        return None
+
+    if (
+        entry["mediaId"] == media["id"]
+        and media["attributes"]["assetDeliveryState"]["state"]
+        == appstore.MediaAssetState.AWAITING_UPLOAD.name
+        and os.path.isfile(path)
+        and file_checksum(path) == entry["checksum"]
+    ):
+        return {
+            **media,
+            "attributes": {
+                **media["attributes"],
+                "uploadOperations": entry["uploadOperations"],
+            },
+        }
+
+    discard_upload(path)
+    return None
+
+
+def start_upload(path: str, media: dict) -> set:
+    """Journal the upload of a reservation, keeping the progress of a resumed upload.
+
+    Returns:
+        set: the offsets of the parts already uploaded
+    """
+    key = os.path.abspath(path)
+    with _journal_lock:
+        journal = _load()
+        entry = journal.get(key)
+        if entry is None or entry["mediaId"] != media["id"]:
+            entry = {
+                "mediaId": media["id"],
+                "checksum": file_checksum(path),
+                "time": time.time(),
+                "uploadOperations": media["attributes"]["uploadOperations"],
+                "uploaded": [],
+            }
+            journal[key] = entry
+            _save()
+        return set(entry["uploaded"])
+
+
+def journal_part(path: str, offset: int) -> None:
+    """Record an uploaded part of the journaled upload of a file."""
+    key = os.path.abspath(path)
+    with _journal_lock:
+        entry = _load().get(key)
+        if entry is not None and offset not in entry["uploaded"]:
+            entry["uploaded"].append(offset)
+            _save()
+
+
+def discard_upload(path: str) -> None:
+    """Remove the journal entry of a file, once committed or no longer resumable."""
+    key = os.path.abspath(path)
+    with _journal_lock:
+        if _load().pop(key, None) is not None:
+            _save()
@@ -1,17 +1,48 @@
 import os
-import requests
+import hashlib
+import threading
+import contextlib
 import colorama
-from typing import Union
+import concurrent.futures
+from typing import Union, Sequence, Callable, Any, Optional
 from enum import Enum, auto
-from appstore_tools.print_util import print_clr, clr, json_term
+from appstore_tools.print_util import (
+    print_clr,
+    clr,
+    json_term,
+    output_group,
+    current_output_group,
+)
+from appstore_tools.cache_util import read_json_cache, write_json_cache
+
+CHECKSUM_CACHE_NAME = "checksums.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+PARTIAL_FILE_EXT = ".part"
+
+_checksum_cache = None
+_checksum_cache_dirty = False
+_checksum_cache_lock = threading.Lock()
 
 
 def get_attributes_file_path(media_file_path: str) -> str:
     return media_file_path + ".json"
 
 
-def fetch_screenshot(screenshot: dict):
-    """Fetches screenshot data. Retuns None if screenshot has no asset."""
+def get_partial_file_path(
+    media_file_path: str,
+    source_checksum: Optional[str],  # pylint: disable=unsubscriptable-object
+) -> str:
+    """Gets the path an unfinished download of a screenshot/preview is written to.
+    Named by the source file checksum, so a partial file only resumes the same source."""
+    if source_checksum is None:
+        return media_file_path + PARTIAL_FILE_EXT
+    return f"{media_file_path}.{source_checksum}{PARTIAL_FILE_EXT}"
+
+
+def get_screenshot_url(
+    screenshot: dict,
+) -> Optional[str]:  # pylint: disable=unsubscriptable-object
+    """Gets the screenshot download url. Retuns None if screenshot has no asset."""
     attr = screenshot["attributes"]
     file_ext = os.path.splitext(attr["fileName"])[1]
     if attr["imageAsset"] is None:
@@ -21,23 +52,86 @@ def fetch_screenshot(screenshot: dict):
     height = attr["imageAsset"]["height"]
     url_template = attr["imageAsset"]["templateUrl"]
 
-    url = url_template.format(w=width, h=height, f=file_ext[1:])
-    return requests.get(url)
+    return url_template.format(w=width, h=height, f=file_ext[1:])
 
 
-def fetch_preview(preview: dict):
-    """Fetches screenshot data. Retuns None if screenshot has no asset."""
-    attr = preview["attributes"]
-    url = attr["videoUrl"]
-    if url is None:
-        return None
-    else:
-        return requests.get(url)
+def get_preview_url(
+    preview: dict,
+) -> Optional[str]:  # pylint: disable=unsubscriptable-object
+    """Gets the preview download url. Retuns None if preview has no asset."""
+    return preview["attributes"]["videoUrl"]
 
 
-def write_binary_file(path: str, content: bytes) -> None:
-    with open(file=path, mode="wb") as file:
-        file.write(content)
+def update_file_hash(file_hash: Any, path: str) -> None:
+    """Feed a file's contents to a hashlib hash, streaming it in chunks."""
+    with open(file=path, mode="rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            file_hash.update(chunk)
+
+
+def hash_file(path: str) -> str:
+    """Compute the md5 of a file, streaming it in chunks."""
+    file_hash = hashlib.md5()
+    update_file_hash(file_hash, path)
+    return file_hash.hexdigest()
+
+
+def _stat_fingerprint(stat: os.stat_result) -> list:
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def file_checksum(
+    path: str,
+    stat: Optional[os.stat_result] = None,  # pylint: disable=unsubscriptable-object
+) -> str:
+    """Gets the md5 of a file, reusing the cached checksum while the file's
+    path, size, modification time and inode are unchanged.
+    A `stat` already taken of the file saves another."""
+    global _checksum_cache
+
+    stat = stat or os.stat(path)
+    key = os.path.abspath(path)
+    fingerprint = _stat_fingerprint(stat)
+
+    with _checksum_cache_lock:
+        if _checksum_cache is None:
+            _checksum_cache = read_json_cache(CHECKSUM_CACHE_NAME)
+        entry = _checksum_cache.get(key)
+    if entry is not None and entry["stat"] == fingerprint:
+        return entry["md5"]
+
+    checksum = hash_file(path)
+    cache_file_checksum(path, checksum, stat)
+    return checksum
+
+
+def cache_file_checksum(
+    path: str,
+    checksum: str,
+    stat: Optional[os.stat_result] = None,  # pylint: disable=unsubscriptable-object
+) -> None:
+    """Record the md5 of a file already hashed (Ex: while it was written), for `file_checksum`."""
+    global _checksum_cache, _checksum_cache_dirty
+
+    stat = stat or os.stat(path)
+    with _checksum_cache_lock:
+        if _checksum_cache is None:
+            _checksum_cache = read_json_cache(CHECKSUM_CACHE_NAME)
+        _checksum_cache[os.path.abspath(path)] = {
+            "stat": _stat_fingerprint(stat),
+            "md5": checksum,
+        }
+        _checksum_cache_dirty = True
+
+
+def save_checksum_cache() -> None:
+    """Persist the checksums computed by `file_checksum` for future runs."""
+    global _checksum_cache_dirty
+
+    with _checksum_cache_lock:
+        if _checksum_cache is not None and _checksum_cache_dirty:
+            write_json_cache(CHECKSUM_CACHE_NAME, _checksum_cache)
+            _checksum_cache_dirty = False
 
 
 def write_txt_file(path: str, content: str) -> None:
@@ -45,6 +139,18 @@ def write_txt_file(path: str, content: str) -> None:
         file.write(content)
 
 
+def update_txt_file(path: str, content: str) -> bool:
+    """Write a text file, unless it already has the content.
+
+    Returns:
+        bool: True if the file was written
+    """
+    if read_txt_file(path) == content:
+        return False
+    write_txt_file(path, content)
+    return True
+
+
 def read_txt_file(
     path: str,
 ) -> Union[str, None]:  # pylint: disable=unsubscriptable-object
@@ -55,6 +161,44 @@ def read_txt_file(
         return None
 
 
+def run_concurrently(
+    tasks: Sequence[Callable[[], Any]],
+    jobs: int,
+    limit: Optional[
+        threading.Semaphore
+    ] = None,  # pylint: disable=unsubscriptable-object
+) -> list:
+    """Run the tasks on up to `jobs` worker threads, returning their results in order.
+
+    A `limit` semaphore shared between calls caps how many of their tasks run at once,
+    across nested pools. Only pass it for tasks that don't wait on other limited tasks.
+
+    Each task's output is grouped and emitted when the task finishes. With a single job,
+    the tasks run in order on the calling thread and print as they go."""
+    if jobs <= 1:
+        return [task() for task in tasks]
+
+    limit = limit or contextlib.nullcontext()
+    if len(tasks) == 1:
+        with limit:
+            return [tasks[0]()]
+
+    parent = current_output_group()
+
+    def run(task: Callable[[], Any]):
+        with limit, output_group(parent=parent):
+            return task()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run, task) for task in tasks]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 def print_info_status(info_state: str, status: str):
     print_clr(f"{colorama.Fore.CYAN}{info_state}", f" - {status}")
 
@@ -0,0 +1,116 @@
+import time
+import threading
+import colorama
+from typing import Sequence
+from appstore_tools import appstore
+from appstore_tools.appstore.auth import AccessToken
+
+from .util import print_media_status
+
+POLL_SECS = 2.0
+POLL_BACKOFF = 1.5
+POLL_MAX_SECS = 15.0
+
+
+def is_processing(media: dict) -> bool:
+    """Test whether the appstore is still processing an uploaded screenshot/preview."""
+    return (
+        media["attributes"]["assetDeliveryState"]["state"]
+        == appstore.MediaAssetState.UPLOAD_COMPLETE.name
+    )
+
+
+class MediaProcessingWaiter:
+    """Waits for uploaded screenshots and previews to finish processing.
+
+    Every thread waiting on media shares one poller: each poll lists the screenshot/preview
+    sets with pending media (one request per set), and wakes the waiters whose media
+    resolved. All waits share one deadline, which starts with the first wait."""
+
+    def __init__(self, access_token: AccessToken, timeout_secs: float):
+        self.access_token = access_token
+        self.timeout_secs = float(timeout_secs)
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._polling = False
+        self._poll_secs = POLL_SECS
+        # (kind, set id) -> ids of the media still processing
+        self._pending = {}
+        # media id -> media, as last seen from the appstore
+        self._media = {}
+
+    def _list_set(self, kind: str, set_id: str) -> list:
+        if kind == "screenshots":
+            return appstore.get_screenshots(
+                screenshot_set_id=set_id, access_token=self.access_token
+            )
+        return appstore.get_previews(
+            preview_set_id=set_id, access_token=self.access_token
+        )
+
+    def _poll(self) -> None:
+        """List every set with pending media, and resolve the media that finished."""
+        with self._cond:
+            keys = [k for k, ids in self._pending.items() if ids]
+
+        for kind, set_id in keys:
+            media = self._list_set(kind, set_id)
+            with self._cond:
+                pending = self._pending[(kind, set_id)]
+                for m in media:
+                    if m["id"] in pending:
+                        self._media[m["id"]] = m
+                        if not is_processing(m):
+                            pending.discard(m["id"])
+                # Media removed from the set will never finish
+                pending.intersection_update(m["id"] for m in media)
+
+    def wait(self, kind: str, set_id: str, media: Sequence[dict]) -> list:
+        """Wait until none of the media in a set are processing, or the deadline passes.
+
+        Args:
+            kind: "screenshots" or "previews"
+
+        Returns:
+            list: the media, as last seen from the appstore
+        """
+        key = (kind, set_id)
+        media_ids = [m["id"] for m in media]
+        with self._cond:
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.timeout_secs
+            pending = self._pending.setdefault(key, set())
+            for m in media:
+                self._media[m["id"]] = m
+                if is_processing(m):
+                    pending.add(m["id"])
+
+        while True:
+            with self._cond:
+                remaining_secs = self._deadline - time.monotonic()
+                waiting = [x for x in media_ids if x in self._pending[key]]
+                if not waiting or remaining_secs <= 0:
+                    return [self._media[x] for x in media_ids]
+                if self._polling:
+                    # Another thread is polling, and will wake us after it does
+                    self._cond.wait(timeout=remaining_secs)
+                    continue
+                self._polling = True
+                poll_secs = min(self._poll_secs, remaining_secs)
+                self._poll_secs = min(POLL_MAX_SECS, self._poll_secs * POLL_BACKOFF)
+                pending_count = sum(len(x) for x in self._pending.values())
+
+            try:
+                elapsed_secs = self.timeout_secs - remaining_secs
+                for media_id in waiting:
+                    print_media_status(
+                        self._media[media_id]["attributes"]["fileName"],
+                        colorama.Fore.CYAN,
+                        f"{elapsed_secs:.0f}s - waiting for processing ({pending_count} pending)...",
+                    )
+                time.sleep(poll_secs)
+                self._poll()
+            finally:
+                with self._cond:
+                    self._polling = False
+                    self._cond.notify_all()
@@ -0,0 +1,63 @@
+import time
+import logging
+from appstore_tools import appstore
+from appstore_tools.appstore.auth import AccessToken
+from appstore_tools.cache_util import read_json_cache, write_json_cache
+
+APP_INDEX_CACHE_NAME = "app_index.json"
+DEFAULT_APP_INDEX_TTL_SECS = 24 * 60 * 60
+
+
+def _read_issuer_index(issuer_id: str, ttl_secs: float) -> dict:
+    """Reads the unexpired bundle id -> app id entries for an issuer."""
+    index = read_json_cache(APP_INDEX_CACHE_NAME).get(issuer_id, {})
+    oldest = time.time() - ttl_secs
+    return {k: v for k, v in index.items() if v.get("time", 0) >= oldest}
+
+
+def _write_issuer_entry(issuer_id: str, bundle_id: str, app_id: int) -> None:
+    index = read_json_cache(APP_INDEX_CACHE_NAME)
+    index.setdefault(issuer_id, {})[bundle_id] = {
+        "appId": int(app_id),
+        "time": time.time(),
+    }
+    write_json_cache(APP_INDEX_CACHE_NAME, index)
+
+
+def get_app_id(
+    bundle_id: str,
+    access_token: AccessToken,
+    ttl_secs: float = DEFAULT_APP_INDEX_TTL_SECS,
+) -> int:
+    """Get the app id for the bundle id, using the local index when it has a fresh entry."""
+    if ttl_secs > 0:
+        entry = _read_issuer_index(access_token.issuer_id, ttl_secs).get(bundle_id)
+        if entry is not None:
+            logging.info(f"app index: {bundle_id} -> {entry['appId']} (cached)")
+            return entry["appId"]
+
+    app_id = appstore.get_app_id(bundle_id=bundle_id, access_token=access_token)
+    if ttl_secs > 0:
+        _write_issuer_entry(access_token.issuer_id, bundle_id, app_id)
+    return app_id
+
+
+def get_bundle_id(
+    app_id: int,
+    access_token: AccessToken,
+    ttl_secs: float = DEFAULT_APP_INDEX_TTL_SECS,
+) -> str:
+    """Get the bundle id for the app id, using the local index when it has a fresh entry."""
+    if ttl_secs > 0:
+        index = _read_issuer_index(access_token.issuer_id, ttl_secs)
+        bundle_id = next(
+            (k for k, v in index.items() if v["appId"] == int(app_id)), None
+        )
+        if bundle_id is not None:
+            logging.info(f"app index: {app_id} -> {bundle_id} (cached)")
+            return bundle_id
+
+    bundle_id = appstore.get_bundle_id(app_id=str(app_id), access_token=access_token)
+    if ttl_secs > 0:
+        _write_issuer_entry(access_token.issuer_id, bundle_id, int(app_id))
+    return bundle_id
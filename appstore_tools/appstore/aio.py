@@ -0,0 +1,1176 @@
+"""Asyncio counterpart of the `appstore` api.
+
+Every api function is mirrored here as a coroutine with the same name and arguments
+(Ex: `await aio.get_screenshots(...)`), so independent requests can be awaited
+concurrently from a single thread. Requests share a bounded, keep-alive connection pool.
+
+Requires the optional `aiohttp` dependency: `pip install appstore-tools[aio]`
+"""
+import asyncio
+import gzip
+import json
+import logging
+import colorama
+import requests
+from typing import Union, Sequence, AsyncIterator, Callable
+
+try:
+    import aiohttp
+except ImportError as error:
+    raise ImportError(
+        "appstore.aio requires the aiohttp package. Install it with: pip install appstore-tools[aio]"
+    ) from error
+
+from appstore_tools.print_util import json_term, clr
+from .auth import AccessToken
+from .exceptions import ResourceNotFoundException
+from .fetch import (
+    APPSTORE_URI_ROOT,
+    DEFAULT_POOL_SIZE,
+    PAGE_LIMIT_MAX,
+    STREAM_CHUNK_SIZE,
+    FetchMethod,
+    GzipLineDecoder,
+    query_path,
+)
+from .retry import (
+    DEFAULT_MAX_RETRIES,
+    IDEMPOTENT_METHODS,
+    backoff_secs,
+    retry_after_secs,
+    should_retry,
+    rate_limiter,
+)
+from .types import (
+    Platform,
+    PlatformList,
+    ScreenshotDisplayType,
+    PreviewType,
+    VersionState,
+    VersionStateList,
+    InfoAttributes,
+    InfoLocalizationAttributes,
+    VersionAttributes,
+    VersionLocalizationAttributes,
+)
+from .api import (
+    SCREENSHOTS_INCLUDE_LIMIT,
+    PREVIEWS_INCLUDE_LIMIT,
+    index_included,
+    resolve_related,
+)
+from .util import enum_name, enum_names, enum_filter_value, editable_version_states
+
+_session = None
+_session_loop = None
+_pool_size = DEFAULT_POOL_SIZE
+
+
+def configure_session(pool_size: int = DEFAULT_POOL_SIZE) -> None:
+    """Set the connection pool size used by sessions created after this call."""
+    global _pool_size
+    _pool_size = pool_size
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Get the shared http session of the running event loop, creating it if needed."""
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(limit=_pool_size, limit_per_host=_pool_size)
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared http session and its pooled connections."""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def iter_gzip_lines(
+    response: aiohttp.ClientResponse, chunk_size: int = STREAM_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """Decompress and decode a gzipped response body incrementally, yielding one line at a time."""
+    decoder = GzipLineDecoder()
+    try:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            for line in decoder.feed(chunk):
+                yield line
+        for line in decoder.flush():
+            yield line
+    finally:
+        response.release()
+
+
+async def fetch(
+    method: Union[FetchMethod, str],  # pylint: disable=unsubscriptable-object
+    path: str,
+    access_token: AccessToken,
+    headers: dict = {},
+    data=None,
+    stream: bool = False,
+    retries: int = DEFAULT_MAX_RETRIES,
+):
+    """Fetch a URL resource via the AppStore connect api.
+
+    Mirrors `appstore.fetch`, including its retry and rate limiting behaviour."""
+    url = APPSTORE_URI_ROOT + path if path.startswith("/") else path
+
+    logging.debug(
+        clr(
+            f"{colorama.Fore.GREEN}appstore.aio.fetch: {enum_name(method)} {colorama.Fore.MAGENTA}{url}\n",
+            f"{colorama.Fore.BLUE}request body:\n",
+            json_term(data),
+        )
+    )
+
+    if not isinstance(method, FetchMethod):
+        try:
+            method = FetchMethod[method]
+        except KeyError:
+            raise ValueError(
+                f"{method} is not a valid FetchMethod. Options are {list(FetchMethod)}"
+            )
+
+    body = None
+    if method in (FetchMethod.POST, FetchMethod.PATCH):
+        headers = {"Content-Type": "application/json", **headers}
+        body = json.dumps(data)
+
+    session = get_session()
+    attempt = 0
+    while True:
+        await rate_limiter.acquire_async()
+        try:
+            response = await session.request(
+                method=method.name,
+                url=url,
+                headers={"Authorization": f"Bearer {access_token}", **headers},
+                data=body,
+            )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+            if attempt >= retries or method.name not in IDEMPOTENT_METHODS:
+                raise requests.exceptions.ConnectionError(error) from error
+            delay_secs = backoff_secs(attempt)
+            logging.info(f"appstore.aio.fetch: {error}, retrying in {delay_secs:.1f}s")
+        else:
+            rate_limiter.update(response.headers.get("X-Rate-Limit"))
+            if attempt >= retries or not should_retry(method.name, response.status):
+                break
+            delay_secs = retry_after_secs(response.headers)
+            if delay_secs is None:
+                delay_secs = backoff_secs(attempt)
+            logging.info(
+                f"appstore.aio.fetch: {method.name} {url} (HttpError {response.status}), retrying in {delay_secs:.1f}s"
+            )
+            response.release()
+
+        await asyncio.sleep(delay_secs)
+        attempt += 1
+
+    content_type = response.content_type
+
+    if content_type == "application/json":
+        result = await response.json()
+        logging.debug(clr(f"{colorama.Fore.BLUE}response body:\n", json_term(result)))
+    elif content_type == "application/a-gzip":
+        if stream and response.ok:
+            return iter_gzip_lines(response)
+        result = gzip.decompress(await response.read()).decode("utf-8")
+    else:
+        result = await response.read()
+
+    # raise exceptions for easier handling
+    if response.status == 404:
+        raise ResourceNotFoundException(
+            f'{method.name} {url} (HttpError {response.status})\n{json_term({"request": data, "response":result})}'
+        )
+    elif not response.ok:
+        raise requests.exceptions.HTTPError(
+            f'{url} {method.name} (HttpError {response.status})\n{json_term({"request": data, "response":result})}'
+        )
+
+    return result
+
+
+async def fetch_pages(
+    path: str,
+    access_token: AccessToken,
+    limit: int = PAGE_LIMIT_MAX,
+) -> AsyncIterator[dict]:
+    """Fetch each page of a resource collection, following the `links.next` url."""
+    next_path = query_path(path, {"limit": limit})
+    while next_path:
+        page = await fetch(
+            method=FetchMethod.GET, path=next_path, access_token=access_token
+        )
+        yield page
+        next_path = page.get("links", {}).get("next")
+
+
+async def fetch_all(
+    path: str,
+    access_token: AccessToken,
+    limit: int = PAGE_LIMIT_MAX,
+) -> AsyncIterator[dict]:
+    """Fetch every resource of a collection across all its pages."""
+    async for page in fetch_pages(path=path, access_token=access_token, limit=limit):
+        for resource in page["data"]:
+            yield resource
+
+
+def iter_categories(
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+) -> AsyncIterator[dict]:
+    """Iterate the possible categories/subcategories on the app store, page by page."""
+    return fetch_all(
+        path=f"/appCategories?filter[platforms]={','.join(enum_names(platforms))}&exists[parent]=false&include=subcategories",
+        access_token=access_token,
+    )
+
+
+async def get_categories(
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+):
+    """Get this list of possible categories/subcategories on the app store."""
+    return [
+        x async for x in iter_categories(access_token=access_token, platforms=platforms)
+    ]
+
+
+def iter_apps(
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate all apps under the users app store account, page by page."""
+    return fetch_all(path=f"/apps", access_token=access_token)
+
+
+async def get_apps(
+    access_token: AccessToken,
+):
+    """Get all apps under the users app store account."""
+    return [x async for x in iter_apps(access_token=access_token)]
+
+
+async def get_app(
+    app_id: str,
+    access_token: AccessToken,
+):
+    """Get app by id."""
+    return (
+        await fetch(
+            method=FetchMethod.GET, path=f"/apps/{app_id}", access_token=access_token
+        )
+    )["data"]
+
+
+async def get_app_id(
+    bundle_id: str,
+    access_token: AccessToken,
+) -> int:
+    """Get the app id for the specified bundle id."""
+    apps = fetch_all(
+        path=query_path("/apps", {"filter[bundleId]": bundle_id}),
+        access_token=access_token,
+    )
+    async for app in apps:
+        if app["attributes"]["bundleId"] == bundle_id:
+            return int(app["id"])
+    raise ResourceNotFoundException(f'No app matching bundle-id "{bundle_id}"')
+
+
+async def get_bundle_id(
+    app_id: str,
+    access_token: AccessToken,
+) -> int:
+    """Get the bundle id for the specified app id."""
+    app = await get_app(app_id=app_id, access_token=access_token)
+    return app["attributes"]["bundleId"]
+
+
+async def iter_infos(
+    app_id: str,
+    access_token: AccessToken,
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+) -> AsyncIterator[dict]:
+    """Iterate the app infos page by page, optionally filtering by appstore state.
+    Use `fields` to limit the returned attributes (appStoreState is always included).
+
+    The appInfos relationship has no state filter, so states are filtered client-side."""
+    if fields:
+        fields = {"appStoreState", *fields}
+    infos = fetch_all(
+        path=query_path(
+            f"/apps/{app_id}/appInfos",
+            {"fields[appInfos]": ",".join(sorted(fields))},
+        ),
+        access_token=access_token,
+    )
+
+    state_names = set(enum_names(states))
+    async for v in infos:
+        if v["attributes"]["appStoreState"] in state_names:
+            yield v
+
+
+async def get_infos(
+    app_id: str,
+    access_token: AccessToken,
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+):
+    """Get the list of app infos, optionally filtering by appstore state."""
+    return [
+        x
+        async for x in iter_infos(
+            app_id=app_id, access_token=access_token, states=states, fields=fields
+        )
+    ]
+
+
+async def update_info(
+    info_id: str,
+    info_attributes: InfoAttributes,
+    access_token: AccessToken,
+):
+    """Update the non-localized AppInfo data."""
+    relationships = {}
+    for k, v in info_attributes.items():
+        relationships[k] = {"data": {"id": v, "type": "appCategories"}}
+
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appInfos/{info_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": info_id,
+                    "relationships": relationships,
+                    "type": "appInfos",
+                }
+            },
+        )
+    )["data"]
+
+
+def iter_info_localizations(
+    info_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the app info localizations, page by page."""
+    return fetch_all(
+        path=f"/appInfos/{info_id}/appInfoLocalizations",
+        access_token=access_token,
+    )
+
+
+async def get_info_localizations(
+    info_id: str,
+    access_token: AccessToken,
+):
+    """Get the list of app info localizations."""
+    return [
+        x
+        async for x in iter_info_localizations(
+            info_id=info_id, access_token=access_token
+        )
+    ]
+
+
+async def create_info_localization(
+    info_id: str,
+    locale: str,
+    info_localization_attributes: InfoLocalizationAttributes,
+    access_token: AccessToken,
+):
+    """Creates a new app store info localization."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appInfoLocalizations",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {"locale": locale, **info_localization_attributes},
+                    "relationships": {
+                        "appInfo": {"data": {"id": info_id, "type": "appInfos"}}
+                    },
+                    "type": "appInfoLocalizations",
+                }
+            },
+        )
+    )["data"]
+
+
+async def update_info_localization(
+    info_localization_id: str,
+    info_localization_attributes: InfoLocalizationAttributes,
+    access_token: AccessToken,
+):
+    """Updates the meta data for the specified App Info Localization.
+    Some data fields require the App Version to be in an editable state."""
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appInfoLocalizations/{info_localization_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": info_localization_id,
+                    "attributes": info_localization_attributes,
+                    "type": "appInfoLocalizations",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_info_localization(
+    info_localization_id: str,
+    access_token: AccessToken,
+):
+    """Deletes the specified App Info Localization."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appInfoLocalizations/{info_localization_id}",
+        access_token=access_token,
+    )
+
+
+async def create_version(
+    app_id: str,
+    platform: Union[Platform, str],  # pylint: disable=unsubscriptable-object
+    version_string: str,
+    access_token: AccessToken,
+):
+    """Creates a new app version."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appStoreVersions/",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {
+                        "platform": enum_name(platform),
+                        "versionString": version_string,
+                    },
+                    "relationships": {"app": {"data": {"id": app_id, "type": "apps"}}},
+                    "type": "appStoreVersions",
+                }
+            },
+        )
+    )["data"]
+
+
+async def update_version(
+    version_id: str,
+    version_attributes: VersionAttributes,
+    access_token: AccessToken,
+):
+    """Update an app version."""
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appStoreVersions/{version_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": version_id,
+                    "attributes": version_attributes,
+                    "type": "appStoreVersions",
+                }
+            },
+        )
+    )["data"]
+
+
+async def iter_versions(
+    app_id: str,
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+) -> AsyncIterator[dict]:
+    """Iterate the app versions page by page, optionally filtering by platform and/or state.
+    Use `fields` to limit the returned attributes (platform and appStoreState are always included).
+
+    Filters are applied by the server, and re-checked client-side as a fallback."""
+    if fields:
+        fields = {"platform", "appStoreState", *fields}
+    versions = fetch_all(
+        path=query_path(
+            f"/apps/{app_id}/appStoreVersions",
+            {
+                "filter[platform]": enum_filter_value(platforms, Platform),
+                "filter[appStoreState]": enum_filter_value(states, VersionState),
+                "fields[appStoreVersions]": ",".join(sorted(fields)),
+            },
+        ),
+        access_token=access_token,
+    )
+
+    platform_names = set(enum_names(platforms))
+    state_names = set(enum_names(states))
+    async for v in versions:
+        if (
+            v["attributes"]["platform"] in platform_names
+            and v["attributes"]["appStoreState"] in state_names
+        ):
+            yield v
+
+
+async def get_versions(
+    app_id: str,
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+):
+    """Get the list of app versions, optionally filtering by platform and/or state."""
+    return [
+        x
+        async for x in iter_versions(
+            app_id=app_id,
+            access_token=access_token,
+            platforms=platforms,
+            states=states,
+            fields=fields,
+        )
+    ]
+
+
+async def get_versions_editable(
+    app_id: str,
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+):
+    return await get_versions(
+        app_id=app_id,
+        access_token=access_token,
+        platforms=platforms,
+        states=[s.name for s in editable_version_states],
+    )
+
+
+async def get_version_live(
+    app_id: str,
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+):
+    live_state = VersionState.READY_FOR_SALE.name
+    versions = iter_versions(
+        app_id=app_id,
+        access_token=access_token,
+        platforms=platforms,
+        states=[live_state],
+    )
+
+    async for version in versions:
+        return version
+    raise ResourceNotFoundException(f'No app version matching state "{live_state}"')
+
+
+def iter_version_localizations(
+    version_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the app version localizations, page by page."""
+    return fetch_all(
+        path=f"/appStoreVersions/{version_id}/appStoreVersionLocalizations",
+        access_token=access_token,
+    )
+
+
+async def get_version_localizations(
+    version_id: str,
+    access_token: AccessToken,
+):
+    """Get the list of app version localizations."""
+    return [
+        x
+        async for x in iter_version_localizations(
+            version_id=version_id, access_token=access_token
+        )
+    ]
+
+
+async def create_version_localization(
+    version_id: str,
+    locale: str,
+    localization_attributes: VersionLocalizationAttributes,
+    access_token: AccessToken,
+):
+    """Creates a new app store version localization."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appStoreVersionLocalizations",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {"locale": locale, **localization_attributes},
+                    "relationships": {
+                        "appStoreVersion": {
+                            "data": {"id": version_id, "type": "appStoreVersions"}
+                        }
+                    },
+                    "type": "appStoreVersionLocalizations",
+                }
+            },
+        )
+    )["data"]
+
+
+async def update_version_localization(
+    localization_id: str,
+    localization_attributes: VersionLocalizationAttributes,
+    access_token: AccessToken,
+):
+    """Updates the meta data for the specified App Version Localization.
+    Some data fields require the App Version to be in an editable state."""
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appStoreVersionLocalizations/{localization_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": localization_id,
+                    "attributes": localization_attributes,
+                    "type": "appStoreVersionLocalizations",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_version_localization(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Deletes the specified App Version Localization."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appStoreVersionLocalizations/{localization_id}",
+        access_token=access_token,
+    )
+
+
+def iter_screenshot_sets(
+    localization_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the screenshot sets of the specified App Version Localization, page by page."""
+    return fetch_all(
+        path=f"/appStoreVersionLocalizations/{localization_id}/appScreenshotSets",
+        access_token=access_token,
+    )
+
+
+async def get_screenshot_sets(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the screenshot sets from the specified App Version Localization."""
+    return [
+        x
+        async for x in iter_screenshot_sets(
+            localization_id=localization_id, access_token=access_token
+        )
+    ]
+
+
+async def create_screenshot_set(
+    localization_id: str,
+    display_type: Union[
+        ScreenshotDisplayType, str
+    ],  # pylint: disable=unsubscriptable-object
+    access_token: AccessToken,
+):
+    """Create a new screenshot set in the specified App Version Localization."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appScreenshotSets",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {"screenshotDisplayType": enum_name(display_type)},
+                    "relationships": {
+                        "appStoreVersionLocalization": {
+                            "data": {
+                                "id": localization_id,
+                                "type": "appStoreVersionLocalizations",
+                            }
+                        }
+                    },
+                    "type": "appScreenshotSets",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_screenshot_set(
+    screenshot_set_id: str,
+    access_token: AccessToken,
+):
+    """Delete a screenshot set from the App Version Localization."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appScreenshotSets/{screenshot_set_id}",
+        access_token=access_token,
+    )
+
+
+async def update_screenshot_order(
+    screenshot_set_id: str,
+    screenshot_ids: Sequence[str],
+    access_token: AccessToken,
+):
+    """Update the order of the screenshots in a screenshot set."""
+    await fetch(
+        method=FetchMethod.PATCH,
+        path=f"/appScreenshotSets/{screenshot_set_id}/relationships/appScreenshots",
+        access_token=access_token,
+        data={
+            "data": [
+                {"id": ss_id, "type": "appScreenshots"} for ss_id in screenshot_ids
+            ]
+        },
+    )
+
+
+def iter_screenshots(
+    screenshot_set_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the screenshots in a screenshot set, page by page."""
+    return fetch_all(
+        path=f"/appScreenshotSets/{screenshot_set_id}/appScreenshots",
+        access_token=access_token,
+    )
+
+
+async def get_screenshots(
+    screenshot_set_id: str,
+    access_token: AccessToken,
+):
+    """Get the screenshots in a screenshot set."""
+    return [
+        x
+        async for x in iter_screenshots(
+            screenshot_set_id=screenshot_set_id, access_token=access_token
+        )
+    ]
+
+
+async def get_screenshot(
+    screenshot_id: str,
+    access_token: AccessToken,
+):
+    """Get the screenshot info."""
+    return (
+        await fetch(
+            method=FetchMethod.GET,
+            path=f"/appScreenshots/{screenshot_id}",
+            access_token=access_token,
+        )
+    )["data"]
+
+
+async def create_screenshot(
+    screenshot_set_id: str,
+    file_name: str,
+    file_size: int,
+    access_token: AccessToken,
+):
+    """Create a screenshot asset reservation in the specified screenshot set.
+    Use the upload operations in the response to upload the file parts."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appScreenshots",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {"fileName": file_name, "fileSize": file_size},
+                    "relationships": {
+                        "appScreenshotSet": {
+                            "data": {
+                                "id": screenshot_set_id,
+                                "type": "appScreenshotSets",
+                            }
+                        }
+                    },
+                    "type": "appScreenshots",
+                }
+            },
+        )
+    )["data"]
+
+
+async def update_screenshot(
+    screenshot_id: str,
+    uploaded: bool,
+    sourceFileChecksum: str,
+    access_token: AccessToken,
+):
+    """Update the screenshot to commit it after a successful upload."""
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appScreenshots/{screenshot_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": screenshot_id,
+                    "attributes": {
+                        "uploaded": uploaded,
+                        "sourceFileChecksum": sourceFileChecksum,
+                    },
+                    "type": "appScreenshots",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_screenshot(
+    screenshot_id: str,
+    access_token: AccessToken,
+):
+    """Delete a screenshot from its screenshot set."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appScreenshots/{screenshot_id}",
+        access_token=access_token,
+    )
+
+
+def iter_preview_sets(
+    localization_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the preview sets in the specified App Version Localization, page by page."""
+    return fetch_all(
+        path=f"/appStoreVersionLocalizations/{localization_id}/appPreviewSets",
+        access_token=access_token,
+    )
+
+
+async def get_preview_sets(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the preview sets in the specified App Version Localization."""
+    return [
+        x
+        async for x in iter_preview_sets(
+            localization_id=localization_id, access_token=access_token
+        )
+    ]
+
+
+async def create_preview_set(
+    localization_id: str,
+    preview_type: Union[PreviewType, str],  # pylint: disable=unsubscriptable-object
+    access_token: AccessToken,
+):
+    """Create a new preview set in the specified App Version Localization."""
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appPreviewSets",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {"previewType": enum_name(preview_type)},
+                    "relationships": {
+                        "appStoreVersionLocalization": {
+                            "data": {
+                                "id": localization_id,
+                                "type": "appStoreVersionLocalizations",
+                            }
+                        }
+                    },
+                    "type": "appPreviewSets",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_preview_set(
+    preview_set_id: str,
+    access_token: AccessToken,
+):
+    """Delete a preview set from the App Version Localization."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appPreviewSets/{preview_set_id}",
+        access_token=access_token,
+    )
+
+
+async def update_preview_order(
+    preview_set_id: str,
+    preview_ids: Sequence[str],
+    access_token: AccessToken,
+):
+    """Update the order of the previews in a preview set."""
+    await fetch(
+        method=FetchMethod.PATCH,
+        path=f"/appPreviewSets/{preview_set_id}/relationships/appPreviews",
+        access_token=access_token,
+        data={"data": [{"id": p_id, "type": "appPreviews"} for p_id in preview_ids]},
+    )
+
+
+def iter_previews(
+    preview_set_id: str,
+    access_token: AccessToken,
+) -> AsyncIterator[dict]:
+    """Iterate the previews in a preview set, page by page."""
+    return fetch_all(
+        path=f"/appPreviewSets/{preview_set_id}/appPreviews",
+        access_token=access_token,
+    )
+
+
+async def get_previews(
+    preview_set_id: str,
+    access_token: AccessToken,
+):
+    """Get the previews in a preview set."""
+    return [
+        x
+        async for x in iter_previews(
+            preview_set_id=preview_set_id, access_token=access_token
+        )
+    ]
+
+
+async def get_preview(
+    preview_id: str,
+    access_token: AccessToken,
+):
+    """Get the preview info."""
+    return (
+        await fetch(
+            method=FetchMethod.GET,
+            path=f"/appPreviews/{preview_id}",
+            access_token=access_token,
+        )
+    )["data"]
+
+
+async def create_preview(
+    preview_set_id: str,
+    file_name: str,
+    file_size: int,
+    access_token: AccessToken,
+    mime_type: str = "",
+    preview_frame_time_code: str = "",
+):
+    """Create a preview asset reservation in the specified preview set.
+    Use the upload operations in the response to upload the file parts."""
+
+    return (
+        await fetch(
+            method=FetchMethod.POST,
+            path=f"/appPreviews",
+            access_token=access_token,
+            data={
+                "data": {
+                    "attributes": {
+                        "fileName": file_name,
+                        "fileSize": file_size,
+                        **({"mimeType": mime_type} if mime_type else {}),
+                        **(
+                            {"previewFrameTimeCode": preview_frame_time_code}
+                            if preview_frame_time_code
+                            else {}
+                        ),
+                    },
+                    "relationships": {
+                        "appPreviewSet": {
+                            "data": {
+                                "id": preview_set_id,
+                                "type": "appPreviewSets",
+                            }
+                        }
+                    },
+                    "type": "appPreviews",
+                }
+            },
+        )
+    )["data"]
+
+
+async def update_preview(
+    preview_id: str,
+    access_token: AccessToken,
+    uploaded: bool = None,
+    source_file_checksum: str = "",
+    preview_frame_time_code: str = "",
+):
+    """Update the preview to commit it after a successful upload."""
+
+    return (
+        await fetch(
+            method=FetchMethod.PATCH,
+            path=f"/appPreviews/{preview_id}",
+            access_token=access_token,
+            data={
+                "data": {
+                    "id": preview_id,
+                    "attributes": {
+                        **({"uploaded": uploaded} if uploaded is not None else {}),
+                        **(
+                            {"sourceFileChecksum": source_file_checksum}
+                            if source_file_checksum
+                            else {}
+                        ),
+                        **(
+                            {"previewFrameTimeCode": preview_frame_time_code}
+                            if preview_frame_time_code
+                            else {}
+                        ),
+                    },
+                    "type": "appPreviews",
+                }
+            },
+        )
+    )["data"]
+
+
+async def delete_preview(
+    preview_id: str,
+    access_token: AccessToken,
+):
+    """Delete a preview from its preview set."""
+    await fetch(
+        method=FetchMethod.DELETE,
+        path=f"/appPreviews/{preview_id}",
+        access_token=access_token,
+    )
+
+
+async def iter_with_related(
+    path: str,
+    relationship: str,
+    relationship_limit: int,
+    key: str,
+    get_related: Callable[[str], AsyncIterator[dict]],
+    access_token: AccessToken,
+    fields: dict = {},
+) -> AsyncIterator[dict]:
+    """Iterate a collection, requesting each resource's related resources in the same
+    compound document and attaching them as `resource[key]`.
+
+    Relationships that were truncated are fetched separately with `get_related(id)`."""
+    pages = fetch_pages(
+        path=query_path(
+            path,
+            {
+                "include": relationship,
+                f"limit[{relationship}]": relationship_limit,
+                **fields,
+            },
+        ),
+        access_token=access_token,
+    )
+    async for page in pages:
+        included_index = index_included(page)
+        for resource in page["data"]:
+            related = resolve_related(resource, relationship, included_index)
+            if related is None:
+                related = [x async for x in get_related(resource["id"])]
+            resource[key] = related
+            yield resource
+
+
+async def get_screenshot_set_tree(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the screenshot sets of an App Version Localization, with each set's
+    screenshots attached as `screenshot_set["screenshots"]`."""
+    return [
+        x
+        async for x in iter_with_related(
+            path=f"/appStoreVersionLocalizations/{localization_id}/appScreenshotSets",
+            relationship="appScreenshots",
+            relationship_limit=SCREENSHOTS_INCLUDE_LIMIT,
+            key="screenshots",
+            get_related=lambda x: iter_screenshots(
+                screenshot_set_id=x, access_token=access_token
+            ),
+            access_token=access_token,
+            fields={
+                "fields[appScreenshotSets]": "screenshotDisplayType,appScreenshots"
+            },
+        )
+    ]
+
+
+async def get_preview_set_tree(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the preview sets of an App Version Localization, with each set's
+    previews attached as `preview_set["previews"]`."""
+    return [
+        x
+        async for x in iter_with_related(
+            path=f"/appStoreVersionLocalizations/{localization_id}/appPreviewSets",
+            relationship="appPreviews",
+            relationship_limit=PREVIEWS_INCLUDE_LIMIT,
+            key="previews",
+            get_related=lambda x: iter_previews(
+                preview_set_id=x, access_token=access_token
+            ),
+            access_token=access_token,
+            fields={"fields[appPreviewSets]": "previewType,appPreviews"},
+        )
+    ]
+
+
+async def get_version_media_tree(
+    version_id: str,
+    access_token: AccessToken,
+    screenshots: bool = True,
+    previews: bool = True,
+):
+    """Get the version localizations with their whole media tree resolved.
+
+    Mirrors `appstore.get_version_media_tree`, loading every localization concurrently."""
+    localizations = await get_version_localizations(
+        version_id=version_id, access_token=access_token
+    )
+
+    async def load(loc: dict):
+        if screenshots:
+            loc["screenshotSets"] = await get_screenshot_set_tree(
+                localization_id=loc["id"], access_token=access_token
+            )
+        if previews:
+            loc["previewSets"] = await get_preview_set_tree(
+                localization_id=loc["id"], access_token=access_token
+            )
+
+    await asyncio.gather(*(load(loc) for loc in localizations))
+    return localizations
@@ -18,13 +18,37 @@ from .types import (
     VersionAttributes,
     VersionLocalizationAttributes,
 )
-from .util import enum_name, enum_names, editable_version_states
+from .util import enum_name, enum_names, enum_filter_value, editable_version_states
 from .fetch import fetch
 from .exceptions import ResourceNotFoundException
-from .fetch import fetch, FetchMethod
+from .fetch import fetch, fetch_all, fetch_pages, query_path, FetchMethod
 
 # TODO: remove pylint "disable" directives when pylint supports python 3.9 completely
-from typing import TypedDict, Optional, Union, Literal, Sequence
+from typing import (
+    TypedDict,
+    Optional,
+    Union,
+    Literal,
+    Sequence,
+    Iterator,
+    Callable,
+    Iterable,
+)
+
+# The most related resources the api will include per resource
+SCREENSHOTS_INCLUDE_LIMIT = 10
+PREVIEWS_INCLUDE_LIMIT = 3
+
+
+def iter_categories(
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+) -> Iterator[dict]:
+    """Iterate the possible categories/subcategories on the app store, page by page."""
+    return fetch_all(
+        path=f"/appCategories?filter[platforms]={','.join(enum_names(platforms))}&exists[parent]=false&include=subcategories",
+        access_token=access_token,
+    )
 
 
 def get_categories(
@@ -32,20 +56,21 @@ def get_categories(
     platforms: PlatformList = list(Platform),
 ):
     """Get this list of possible categories/subcategories on the app store."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appCategories?filter[platforms]={','.join(enum_names(platforms))}&exists[parent]=false&include=subcategories",
-        access_token=access_token,
-    )["data"]
+    return list(iter_categories(access_token=access_token, platforms=platforms))
+
+
+def iter_apps(
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate all apps under the users app store account, page by page."""
+    return fetch_all(path=f"/apps", access_token=access_token)
 
 
 def get_apps(
     access_token: AccessToken,
 ):
     """Get all apps under the users app store account."""
-    return fetch(method=FetchMethod.GET, path=f"/apps", access_token=access_token)[
-        "data"
-    ]
+    return list(iter_apps(access_token=access_token))
 
 
 def get_app(
@@ -63,7 +88,10 @@ def get_app_id(
     access_token: AccessToken,
 ) -> int:
     """Get the app id for the specified bundle id."""
-    apps = get_apps(access_token)
+    apps = fetch_all(
+        path=query_path("/apps", {"filter[bundleId]": bundle_id}),
+        access_token=access_token,
+    )
     try:
         app_id = next(
             app["id"] for app in apps if app["attributes"]["bundleId"] == bundle_id
@@ -82,21 +110,42 @@ def get_bundle_id(
     return app["attributes"]["bundleId"]
 
 
+def iter_infos(
+    app_id: str,
+    access_token: AccessToken,
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+) -> Iterator[dict]:
+    """Iterate the app infos page by page, optionally filtering by appstore state.
+    Use `fields` to limit the returned attributes (appStoreState is always included).
+
+    The appInfos relationship has no state filter, so states are filtered client-side."""
+    if fields:
+        fields = {"appStoreState", *fields}
+    infos = fetch_all(
+        path=query_path(
+            f"/apps/{app_id}/appInfos",
+            {"fields[appInfos]": ",".join(sorted(fields))},
+        ),
+        access_token=access_token,
+    )
+
+    state_names = set(enum_names(states))
+    return (v for v in infos if v["attributes"]["appStoreState"] in state_names)
+
+
 def get_infos(
     app_id: str,
     access_token: AccessToken,
     states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
 ):
     """Get the list of app infos, optionally filtering by appstore state."""
-    versions = fetch(
-        method=FetchMethod.GET,
-        path=f"/apps/{app_id}/appInfos",
-        access_token=access_token,
-    )["data"]
-
-    return [
-        v for v in versions if v["attributes"]["appStoreState"] in enum_names(states)
-    ]
+    return list(
+        iter_infos(
+            app_id=app_id, access_token=access_token, states=states, fields=fields
+        )
+    )
 
 
 def update_info(
@@ -123,16 +172,23 @@ def update_info(
     )["data"]
 
 
+def iter_info_localizations(
+    info_id: str,
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate the app info localizations, page by page."""
+    return fetch_all(
+        path=f"/appInfos/{info_id}/appInfoLocalizations",
+        access_token=access_token,
+    )
+
+
 def get_info_localizations(
     info_id: str,
     access_token: AccessToken,
 ):
     """Get the list of app info localizations."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appInfos/{info_id}/appInfoLocalizations",
-        access_token=access_token,
-    )["data"]
+    return list(iter_info_localizations(info_id=info_id, access_token=access_token))
 
 
 def create_info_localization(
@@ -235,25 +291,58 @@ def update_version(
     )["data"]
 
 
-def get_versions(
+def iter_versions(
     app_id: str,
     access_token: AccessToken,
     platforms: PlatformList = list(Platform),
     states: VersionStateList = list(VersionState),
-):
-    """Get the list of app versions, optionally filtering by platform and/or state."""
-    versions = fetch(
-        method=FetchMethod.GET,
-        path=f"/apps/{app_id}/appStoreVersions",
+    fields: Sequence[str] = (),
+) -> Iterator[dict]:
+    """Iterate the app versions page by page, optionally filtering by platform and/or state.
+    Use `fields` to limit the returned attributes (platform and appStoreState are always included).
+
+    Filters are applied by the server, and re-checked client-side as a fallback."""
+    if fields:
+        fields = {"platform", "appStoreState", *fields}
+    versions = fetch_all(
+        path=query_path(
+            f"/apps/{app_id}/appStoreVersions",
+            {
+                "filter[platform]": enum_filter_value(platforms, Platform),
+                "filter[appStoreState]": enum_filter_value(states, VersionState),
+                "fields[appStoreVersions]": ",".join(sorted(fields)),
+            },
+        ),
         access_token=access_token,
-    )["data"]
+    )
 
-    return [
+    platform_names = set(enum_names(platforms))
+    state_names = set(enum_names(states))
+    return (
         v
         for v in versions
-        if v["attributes"]["platform"] in enum_names(platforms)
-        and v["attributes"]["appStoreState"] in enum_names(states)
-    ]
+        if v["attributes"]["platform"] in platform_names
+        and v["attributes"]["appStoreState"] in state_names
+    )
+
+
+def get_versions(
+    app_id: str,
+    access_token: AccessToken,
+    platforms: PlatformList = list(Platform),
+    states: VersionStateList = list(VersionState),
+    fields: Sequence[str] = (),
+):
+    """Get the list of app versions, optionally filtering by platform and/or state."""
+    return list(
+        iter_versions(
+            app_id=app_id,
+            access_token=access_token,
+            platforms=platforms,
+            states=states,
+            fields=fields,
+        )
+    )
 
 
 def get_versions_editable(
@@ -275,28 +364,39 @@ def get_version_live(
     platforms: PlatformList = list(Platform),
 ):
     live_state = VersionState.READY_FOR_SALE.name
-    versions = get_versions(
+    versions = iter_versions(
         app_id=app_id,
         access_token=access_token,
         platforms=platforms,
         states=[live_state],
     )
 
-    if len(versions) == 0:
+    version = next(versions, None)
+    if version is None:
         raise ResourceNotFoundException(f'No app version matching state "{live_state}"')
     else:
-        return versions[0]
+        return version
 
 
-def get_version_localizations(
+def iter_version_localizations(
     version_id: str,
     access_token: AccessToken,
-):
-    return fetch(
-        method=FetchMethod.GET,
+) -> Iterator[dict]:
+    """Iterate the app version localizations, page by page."""
+    return fetch_all(
         path=f"/appStoreVersions/{version_id}/appStoreVersionLocalizations",
         access_token=access_token,
-    )["data"]
+    )
+
+
+def get_version_localizations(
+    version_id: str,
+    access_token: AccessToken,
+):
+    """Get the list of app version localizations."""
+    return list(
+        iter_version_localizations(version_id=version_id, access_token=access_token)
+    )
 
 
 def create_version_localization(
@@ -357,16 +457,25 @@ def delete_version_localization(
     )
 
 
+def iter_screenshot_sets(
+    localization_id: str,
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate the screenshot sets of the specified App Version Localization, page by page."""
+    return fetch_all(
+        path=f"/appStoreVersionLocalizations/{localization_id}/appScreenshotSets",
+        access_token=access_token,
+    )
+
+
 def get_screenshot_sets(
     localization_id: str,
     access_token: AccessToken,
 ):
     """Get the screenshot sets from the specified App Version Localization."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appStoreVersionLocalizations/{localization_id}/appScreenshotSets",
-        access_token=access_token,
-    )["data"]
+    return list(
+        iter_screenshot_sets(localization_id=localization_id, access_token=access_token)
+    )
 
 
 def create_screenshot_set(
@@ -428,16 +537,25 @@ def update_screenshot_order(
     )
 
 
+def iter_screenshots(
+    screenshot_set_id: str,
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate the screenshots in a screenshot set, page by page."""
+    return fetch_all(
+        path=f"/appScreenshotSets/{screenshot_set_id}/appScreenshots",
+        access_token=access_token,
+    )
+
+
 def get_screenshots(
     screenshot_set_id: str,
     access_token: AccessToken,
 ):
     """Get the screenshots in a screenshot set."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appScreenshotSets/{screenshot_set_id}/appScreenshots",
-        access_token=access_token,
-    )["data"]
+    return list(
+        iter_screenshots(screenshot_set_id=screenshot_set_id, access_token=access_token)
+    )
 
 
 def get_screenshot(
@@ -517,16 +635,25 @@ def delete_screenshot(
     )
 
 
+def iter_preview_sets(
+    localization_id: str,
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate the preview sets in the specified App Version Localization, page by page."""
+    return fetch_all(
+        path=f"/appStoreVersionLocalizations/{localization_id}/appPreviewSets",
+        access_token=access_token,
+    )
+
+
 def get_preview_sets(
     localization_id: str,
     access_token: AccessToken,
 ):
     """Get the preview sets in the specified App Version Localization."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appStoreVersionLocalizations/{localization_id}/appPreviewSets",
-        access_token=access_token,
-    )["data"]
+    return list(
+        iter_preview_sets(localization_id=localization_id, access_token=access_token)
+    )
 
 
 def create_preview_set(
@@ -582,16 +709,23 @@ def update_preview_order(
     )
 
 
+def iter_previews(
+    preview_set_id: str,
+    access_token: AccessToken,
+) -> Iterator[dict]:
+    """Iterate the previews in a preview set, page by page."""
+    return fetch_all(
+        path=f"/appPreviewSets/{preview_set_id}/appPreviews",
+        access_token=access_token,
+    )
+
+
 def get_previews(
     preview_set_id: str,
     access_token: AccessToken,
 ):
     """Get the previews in a preview set."""
-    return fetch(
-        method=FetchMethod.GET,
-        path=f"/appPreviewSets/{preview_set_id}/appPreviews",
-        access_token=access_token,
-    )["data"]
+    return list(iter_previews(preview_set_id=preview_set_id, access_token=access_token))
 
 
 def get_preview(
@@ -692,3 +826,129 @@ def delete_preview(
         path=f"/appPreviews/{preview_id}",
         access_token=access_token,
     )
+
+
+def index_included(page: dict) -> dict:
+    """Index the `included` resources of a compound document by (type, id)."""
+    return {(x["type"], x["id"]): x for x in page.get("included", [])}
+
+
+def resolve_related(
+    resource: dict, relationship: str, included_index: dict
+) -> Optional[list]:  # pylint: disable=unsubscriptable-object
+    """Resolve a to-many relationship against the included resources.
+    Returns None if the relationship wasn't fully included."""
+    related = resource.get("relationships", {}).get(relationship, {})
+    refs = related.get("data")
+    if refs is None:
+        return None
+
+    total = related.get("meta", {}).get("paging", {}).get("total", len(refs))
+    keys = [(x["type"], x["id"]) for x in refs]
+    if len(keys) < total or any(k not in included_index for k in keys):
+        return None
+    return [included_index[k] for k in keys]
+
+
+def iter_with_related(
+    path: str,
+    relationship: str,
+    relationship_limit: int,
+    key: str,
+    get_related: Callable[[str], Iterable[dict]],
+    access_token: AccessToken,
+    fields: dict = {},
+) -> Iterator[dict]:
+    """Iterate a collection, requesting each resource's related resources in the same
+    compound document and attaching them as `resource[key]`.
+
+    Relationships that were truncated are fetched separately with `get_related(id)`."""
+    pages = fetch_pages(
+        path=query_path(
+            path,
+            {
+                "include": relationship,
+                f"limit[{relationship}]": relationship_limit,
+                **fields,
+            },
+        ),
+        access_token=access_token,
+    )
+    for page in pages:
+        included_index = index_included(page)
+        for resource in page["data"]:
+            related = resolve_related(resource, relationship, included_index)
+            if related is None:
+                related = list(get_related(resource["id"]))
+            resource[key] = related
+            yield resource
+
+
+def get_screenshot_set_tree(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the screenshot sets of an App Version Localization, with each set's
+    screenshots attached as `screenshot_set["screenshots"]`."""
+    return list(
+        iter_with_related(
+            path=f"/appStoreVersionLocalizations/{localization_id}/appScreenshotSets",
+            relationship="appScreenshots",
+            relationship_limit=SCREENSHOTS_INCLUDE_LIMIT,
+            key="screenshots",
+            get_related=lambda x: iter_screenshots(
+                screenshot_set_id=x, access_token=access_token
+            ),
+            access_token=access_token,
+            fields={
+                "fields[appScreenshotSets]": "screenshotDisplayType,appScreenshots"
+            },
+        )
+    )
+
+
+def get_preview_set_tree(
+    localization_id: str,
+    access_token: AccessToken,
+):
+    """Get the preview sets of an App Version Localization, with each set's
+    previews attached as `preview_set["previews"]`."""
+    return list(
+        iter_with_related(
+            path=f"/appStoreVersionLocalizations/{localization_id}/appPreviewSets",
+            relationship="appPreviews",
+            relationship_limit=PREVIEWS_INCLUDE_LIMIT,
+            key="previews",
+            get_related=lambda x: iter_previews(
+                preview_set_id=x, access_token=access_token
+            ),
+            access_token=access_token,
+            fields={"fields[appPreviewSets]": "previewType,appPreviews"},
+        )
+    )
+
+
+def get_version_media_tree(
+    version_id: str,
+    access_token: AccessToken,
+    screenshots: bool = True,
+    previews: bool = True,
+):
+    """Get the version localizations with their whole media tree resolved.
+
+    Each localization gets `screenshotSets` and/or `previewSets` lists, and each set gets
+    its `screenshots`/`previews`. Sets and their media are loaded as compound documents,
+    so the tree costs one request per localization and media kind, rather than one per set."""
+    localizations = get_version_localizations(
+        version_id=version_id, access_token=access_token
+    )
+    for loc in localizations:
+        if screenshots:
+            loc["screenshotSets"] = get_screenshot_set_tree(
+                localization_id=loc["id"], access_token=access_token
+            )
+        if previews:
+            loc["previewSets"] = get_preview_set_tree(
+                localization_id=loc["id"], access_token=access_token
+            )
+    return localizations
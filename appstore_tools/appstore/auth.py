@@ -1,9 +1,13 @@
 import time
+import threading
 
 import jwt
+from cryptography.hazmat.primitives import serialization
 
 APPSTORE_AUDIENCE = "appstoreconnect-v1"
 APPSTORE_JWT_ALGO = "ES256"
+APPSTORE_TOKEN_LIFETIME_SECS = 20 * 60
+DEFAULT_REFRESH_MARGIN_SECS = 60
 
 
 class AccessToken:
@@ -11,8 +15,11 @@ class AccessToken:
     _expiration = None
 
     def __str__(self):
-        if time.time() > self._expiration:
-            self._create_or_refresh_access_token()
+        if self._needs_refresh():
+            with self._lock:
+                # another thread may have refreshed while we waited on the lock
+                if self._needs_refresh():
+                    self._create_or_refresh_access_token()
         return self._access_token
 
     def __repr__(self):
@@ -21,28 +28,56 @@ class AccessToken:
     def __unicode__(self):
         return self.__str__()
 
-    def __init__(self, issuer_id: str, key_id: str, key: str):
+    def __init__(
+        self,
+        issuer_id: str,
+        key_id: str,
+        key: str,
+        refresh_margin_secs: float = DEFAULT_REFRESH_MARGIN_SECS,
+    ):
         self.issuer_id = issuer_id
         self.key_id = key_id
         self.key = key
+        self.refresh_margin_secs = refresh_margin_secs
+        self._lock = threading.Lock()
+        # Parse the PEM once, rather than on every refresh
+        self._private_key = serialization.load_pem_private_key(
+            key.encode("utf-8"), password=None
+        )
         self._create_or_refresh_access_token()
 
+    def _needs_refresh(self) -> bool:
+        """Test whether the token expires within the refresh margin."""
+        return time.time() > self._expiration - self.refresh_margin_secs
+
     def _create_or_refresh_access_token(self) -> None:
         """Create an access token for use in the AppStore Connect API."""
 
         # The token's expiration time, in Unix epoch time; tokens that expire more than
         # 20 minutes in the future are not valid (Ex: 1528408800)
-        self._expiration = int(time.time()) + 20 * 60
+        expiration = int(time.time()) + APPSTORE_TOKEN_LIFETIME_SECS
 
         # AppStore JWT
         # https://developer.apple.com/documentation/appstoreconnectapi/generating_tokens_for_api_requests
         self._access_token = jwt.encode(
-            {"iss": self.issuer_id, "exp": self._expiration, "aud": APPSTORE_AUDIENCE},
-            self.key,
+            {"iss": self.issuer_id, "exp": expiration, "aud": APPSTORE_AUDIENCE},
+            self._private_key,
             algorithm=APPSTORE_JWT_ALGO,
             headers={"kid": self.key_id},
         )
+        # Publish the expiration last, so readers never pair it with the old token
+        self._expiration = expiration
 
 
-def create_access_token(issuer_id: str, key_id: str, key: str) -> AccessToken:
-    return AccessToken(issuer_id=issuer_id, key_id=key_id, key=key)
+def create_access_token(
+    issuer_id: str,
+    key_id: str,
+    key: str,
+    refresh_margin_secs: float = DEFAULT_REFRESH_MARGIN_SECS,
+) -> AccessToken:
+    return AccessToken(
+        issuer_id=issuer_id,
+        key_id=key_id,
+        key=key,
+        refresh_margin_secs=refresh_margin_secs,
+    )
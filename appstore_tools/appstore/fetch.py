@@ -3,14 +3,33 @@ import colorama
 import json
 import requests
 import gzip
+import zlib
+import codecs
+import threading
+import time
 from enum import Enum, auto
-from typing import Union
+from typing import Union, Iterator
+from requests.adapters import HTTPAdapter
 from appstore_tools.print_util import clr, json_term
 from .util import enum_name
 from .exceptions import ResourceNotFoundException
+from .retry import (
+    DEFAULT_MAX_RETRIES,
+    IDEMPOTENT_METHODS,
+    backoff_secs,
+    retry_after_secs,
+    should_retry,
+    rate_limiter,
+)
 from appstore_tools.appstore.auth import AccessToken
 
 APPSTORE_URI_ROOT = "https://api.appstoreconnect.apple.com/v1"
+DEFAULT_POOL_SIZE = 10
+PAGE_LIMIT_MAX = 200
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+_session = None
+_session_lock = threading.Lock()
 
 
 class FetchMethod(Enum):
@@ -20,16 +39,104 @@ class FetchMethod(Enum):
     DELETE = auto()
 
 
+def _create_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Replace the shared http session with one using the given connection pool size.
+
+    The session keeps connections alive between calls, so consecutive requests
+    to the same host skip the TCP+TLS handshake."""
+    global _session
+
+    session = _create_session(pool_size)
+    with _session_lock:
+        previous_session, _session = _session, session
+    if previous_session is not None:
+        previous_session.close()
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the shared http session, creating it with the default pool size if needed."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _create_session(DEFAULT_POOL_SIZE)
+        return _session
+
+
+class GzipLineDecoder:
+    """Incrementally decompresses and decodes gzipped utf-8 text into lines."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._pending = ""
+
+    def _split(self, text: str) -> list:
+        *lines, self._pending = (self._pending + text).split("\n")
+        return [line.rstrip("\r") for line in lines]
+
+    def feed(self, data: bytes) -> list:
+        """Decode a chunk of the compressed body, returning the lines it completed."""
+        text = ""
+        while data:
+            text += self._decoder.decode(self._decompressor.decompress(data))
+            # concatenated gzip members restart with a fresh decompressor
+            data = self._decompressor.unused_data if self._decompressor.eof else b""
+            if data:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return self._split(text)
+
+    def flush(self) -> list:
+        """Decode the end of the body, returning any remaining lines."""
+        text = self._decoder.decode(self._decompressor.flush(), final=True)
+        lines = self._split(text)
+        if self._pending:
+            lines.append(self._pending.rstrip("\r"))
+            self._pending = ""
+        return lines
+
+
+def iter_gzip_lines(
+    response: requests.Response, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[str]:
+    """Decompress and decode a gzipped response body incrementally, yielding one line at a time.
+
+    Only a single chunk of the body is held in memory at once."""
+    decoder = GzipLineDecoder()
+    try:
+        for chunk in response.iter_content(chunk_size):
+            if chunk:
+                yield from decoder.feed(chunk)
+        yield from decoder.flush()
+    finally:
+        response.close()
+
+
 def fetch(
     method: Union[FetchMethod, str],  # pylint: disable=unsubscriptable-object
     path: str,
     access_token: AccessToken,
     headers: dict = {},
     data=None,
+    stream: bool = False,
+    retries: int = DEFAULT_MAX_RETRIES,
 ):
-    """Fetch a URL resource via the AppStore connect api."""
-    headers = {"Authorization": f"Bearer {access_token}", **headers}
+    """Fetch a URL resource via the AppStore connect api.
 
+    With `stream`, gzipped responses are returned as a lazy iterator of decoded lines
+    instead of a single string.
+
+    Rate limited and transient server errors are retried up to `retries` times,
+    waiting for the `Retry-After` delay or a jittered exponential backoff."""
     url = APPSTORE_URI_ROOT + path if path.startswith("/") else path
 
     logging.debug(
@@ -47,16 +154,47 @@ def fetch(
             raise ValueError(
                 f"{method} is not a valid FetchMethod. Options are {list(FetchMethod)}"
             )
-    if method == FetchMethod.GET:
-        response = requests.get(url=url, headers=headers)
-    elif method == FetchMethod.POST:
-        headers["Content-Type"] = "application/json"
-        response = requests.post(url=url, headers=headers, data=json.dumps(data))
-    elif method == FetchMethod.PATCH:
-        headers["Content-Type"] = "application/json"
-        response = requests.patch(url=url, headers=headers, data=json.dumps(data))
-    elif method == FetchMethod.DELETE:
-        response = requests.delete(url=url, headers=headers)
+    body = None
+    if method in (FetchMethod.POST, FetchMethod.PATCH):
+        headers = {"Content-Type": "application/json", **headers}
+        body = json.dumps(data)
+
+    session = get_session()
+    attempt = 0
+    while True:
+        rate_limiter.acquire()
+        try:
+            response = session.request(
+                method=method.name,
+                url=url,
+                headers={"Authorization": f"Bearer {access_token}", **headers},
+                data=body,
+                stream=stream,
+            )
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as error:
+            if attempt >= retries or method.name not in IDEMPOTENT_METHODS:
+                raise
+            delay_secs = backoff_secs(attempt)
+            logging.info(f"appstore.fetch: {error}, retrying in {delay_secs:.1f}s")
+        else:
+            rate_limiter.update(response.headers.get("X-Rate-Limit"))
+            if attempt >= retries or not should_retry(
+                method.name, response.status_code
+            ):
+                break
+            delay_secs = retry_after_secs(response.headers)
+            if delay_secs is None:
+                delay_secs = backoff_secs(attempt)
+            logging.info(
+                f"appstore.fetch: {method.name} {url} (HttpError {response.status_code}), retrying in {delay_secs:.1f}s"
+            )
+            response.close()
+
+        time.sleep(delay_secs)
+        attempt += 1
 
     content_type = response.headers["content-type"]
 
@@ -64,14 +202,9 @@ def fetch(
         result = response.json()
         logging.debug(clr(f"{colorama.Fore.BLUE}response body:\n", json_term(result)))
     elif content_type == "application/a-gzip":
-        # TODO implement stream decompress
-        zipped_data = b""
-        for chunk in response.iter_content(1024 * 1024):
-            if chunk:
-                zipped_data += chunk
-
-        unzipped_data = gzip.decompress(zipped_data)
-        result = unzipped_data.decode("utf-8")
+        if stream and response.ok:
+            return iter_gzip_lines(response)
+        result = gzip.decompress(response.content).decode("utf-8")
     else:
         result = response
 
@@ -86,3 +219,36 @@ def fetch(
         )
 
     return result
+
+
+def query_path(path: str, params: dict) -> str:
+    """Append the params that have a value to the path as a query string."""
+    query = "&".join(f"{k}={v}" for k, v in params.items() if v)
+    if not query:
+        return path
+    return path + ("&" if "?" in path else "?") + query
+
+
+def fetch_pages(
+    path: str,
+    access_token: AccessToken,
+    limit: int = PAGE_LIMIT_MAX,
+) -> Iterator[dict]:
+    """Fetch each page of a resource collection, following the `links.next` url.
+
+    Pages are requested lazily, so stopping the iteration early skips the remaining requests."""
+    next_path = query_path(path, {"limit": limit})
+    while next_path:
+        page = fetch(method=FetchMethod.GET, path=next_path, access_token=access_token)
+        yield page
+        next_path = page.get("links", {}).get("next")
+
+
+def fetch_all(
+    path: str,
+    access_token: AccessToken,
+    limit: int = PAGE_LIMIT_MAX,
+) -> Iterator[dict]:
+    """Fetch every resource of a collection across all its pages."""
+    for page in fetch_pages(path=path, access_token=access_token, limit=limit):
+        yield from page["data"]
@@ -0,0 +1,128 @@
+import time
+import asyncio
+import random
+import threading
+import email.utils
+from typing import Optional, Mapping
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECS = 1.0
+BACKOFF_MAX_SECS = 60.0
+
+# Status codes that mean the request was not processed and can be sent again as-is
+RETRY_ANY_METHOD_STATUS_CODES = (429, 503)
+# Status codes that are only safe to retry for idempotent requests
+RETRY_IDEMPOTENT_STATUS_CODES = (500, 502, 504)
+IDEMPOTENT_METHODS = ("GET", "PUT", "PATCH", "DELETE")
+
+# Fraction of the hourly quota kept in reserve before requests start being paced
+RATE_LIMIT_RESERVE = 0.05
+RATE_LIMIT_PERIOD_SECS = 60 * 60
+
+
+def backoff_secs(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given (zero based) retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX_SECS, BACKOFF_BASE_SECS * 2**attempt))
+
+
+def retry_after_secs(
+    headers: Mapping[str, str]
+) -> Optional[float]:  # pylint: disable=unsubscriptable-object
+    """Parse the `Retry-After` response header as either delay seconds or an http date.
+    The headers mapping must be case insensitive, as both requests' and aiohttp's are."""
+    retry_after = headers.get("Retry-After")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
+
+
+def should_retry(method: str, status_code: int) -> bool:
+    """Test whether a response status is transient and the request can be resent."""
+    return status_code in RETRY_ANY_METHOD_STATUS_CODES or (
+        status_code in RETRY_IDEMPOTENT_STATUS_CODES and method in IDEMPOTENT_METHODS
+    )
+
+
+def parse_rate_limit(header: str) -> dict:
+    """Parse Apple's `X-Rate-Limit` header (Ex: "user-hour-lim:3600;user-hour-rem:3599;")."""
+    values = {}
+    for item in header.split(";"):
+        key, _, value = item.partition(":")
+        try:
+            values[key.strip()] = int(value)
+        except ValueError:
+            continue
+    return values
+
+
+class RateLimiter:
+    """Token bucket shared by every request, kept in sync with the `X-Rate-Limit` header.
+
+    The bucket starts unlimited. Once the server reports its quota, the bucket holds the
+    remaining requests (less a small reserve) and refills at the hourly limit's rate, so
+    requests get paced before the server starts rejecting them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = float("inf")
+        self._rate = 0.0
+        self._capacity = float("inf")
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def _take(self) -> float:
+        """Take a token if one is available, otherwise return the seconds until one is."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._rate
+
+    def acquire(self) -> None:
+        """Take a token from the bucket, blocking until one is available."""
+        while (wait_secs := self._take()) > 0:
+            time.sleep(wait_secs)
+
+    async def acquire_async(self) -> None:
+        """Take a token from the bucket, yielding to the event loop until one is available."""
+        while (wait_secs := self._take()) > 0:
+            await asyncio.sleep(wait_secs)
+
+    def update(
+        self, header: Optional[str]
+    ) -> None:  # pylint: disable=unsubscriptable-object
+        """Update the bucket from an `X-Rate-Limit` response header."""
+        if not header:
+            return
+
+        values = parse_rate_limit(header)
+        limit = values.get("user-hour-lim")
+        remaining = values.get("user-hour-rem")
+        if not limit or remaining is None:
+            return
+
+        reserve = limit * RATE_LIMIT_RESERVE
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = limit / RATE_LIMIT_PERIOD_SECS
+            self._capacity = limit - reserve
+            self._tokens = remaining - reserve
+
+
+rate_limiter = RateLimiter()
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Union, Type
 from enum import Enum
 from .types import EnumList, VersionState
 
@@ -22,6 +22,15 @@ def enum_names(x_list: EnumList):
     return (enum_name(x) for x in x_list)
 
 
+def enum_filter_value(x_list: EnumList, enum_type: Type[Enum]) -> str:
+    """Comma separated names for a `filter[...]` query param.
+    Empty when every member of the enum is included, since that filters nothing."""
+    names = set(enum_names(x_list))
+    if names.issuperset(x.name for x in enum_type):
+        return ""
+    return ",".join(sorted(names))
+
+
 def version_state_is_editable(
     version_state: Union[VersionState, str]  # pylint: disable=unsubscriptable-object
 ) -> bool:
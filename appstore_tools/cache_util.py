@@ -0,0 +1,59 @@
+import os
+import json
+import tempfile
+from typing import Any
+
+CACHE_DIR_ENV = "APPSTORE_TOOLS_CACHE_DIR"
+
+
+def get_cache_dir() -> str:
+    """Gets the directory for local caches, honoring $APPSTORE_TOOLS_CACHE_DIR and $XDG_CACHE_HOME."""
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        cache_dir = os.path.join(cache_home, "appstore-tools")
+    return cache_dir
+
+
+def get_cache_path(name: str) -> str:
+    return os.path.join(get_cache_dir(), name)
+
+
+def read_json_file(path: str, default: Any = None) -> Any:
+    """Reads a json file, returning the default if it is missing or unreadable."""
+    try:
+        with open(file=path, mode="r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_file(path: str, content: Any) -> None:
+    """Writes a json file atomically, so readers never see a partially written file."""
+    dir_name = os.path.dirname(path) or "."
+    os.makedirs(name=dir_name, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(content, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_json_cache(name: str) -> dict:
+    """Reads a named cache file from the cache directory. Missing caches read as empty."""
+    content = read_json_file(get_cache_path(name), default={})
+    return content if isinstance(content, dict) else {}
+
+
+def write_json_cache(name: str, content: dict) -> None:
+    """Writes a named cache file to the cache directory.
+    Failing to write a cache is not an error, since it only costs a future lookup."""
+    try:
+        write_json_file(get_cache_path(name), content)
+    except OSError:
+        pass
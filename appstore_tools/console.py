@@ -4,6 +4,7 @@ import logging
 import appstore_tools.console_actions as console_actions
 import appstore_tools.appstore as appstore
 import appstore_tools.actions as actions
+import appstore_tools.app_index as app_index
 import requests
 import sys
 from appstore_tools.print_util import print_clr, clr, clr_extra, clr_keyword, clr_usage
@@ -124,6 +125,15 @@ def add_log_level_argument(parser: configargparse.ArgumentParser):
     )
 
 
+def add_pool_size_argument(parser: configargparse.ArgumentParser):
+    parser.add_argument(
+        "--pool-size",
+        type=arg_type_positive_int,
+        default=appstore.DEFAULT_POOL_SIZE,
+        help="The number of keep-alive connections to pool per host.",
+    )
+
+
 def add_platform_argument(parser: configargparse.ArgumentParser):
     parser.add_argument(
         "--platform",
@@ -230,6 +240,7 @@ def add_global_group(parser: configargparse.ArgumentParser):
     add_version_argument(global_group)
     add_config_argument(global_group)
     add_log_level_argument(global_group)
+    add_pool_size_argument(global_group)
 
 
 def add_asset_dir_argument(parser: configargparse.ArgumentParser):
@@ -296,6 +307,12 @@ def add_app_id_group(parser: configargparse.ArgumentParser):
         "--bundle-id",
         help='The App\'s Bundle ID in the form "com.example.myapp".',
     )
+    app_group.add_argument(
+        "--app-index-ttl",
+        type=int,
+        default=app_index.DEFAULT_APP_INDEX_TTL_SECS,
+        help="Seconds to trust the locally cached Bundle ID to App ID mapping. Use 0 to disable the cache.",
+    )
 
 
 def run():
@@ -428,6 +445,16 @@ def run():
         action="store_true",
         help="Allows downloading into an existing app directory and potentially overwriting existing files.",
     )
+    download_group.add_argument(
+        "--sync",
+        action="store_true",
+        help="Update an existing app directory, only downloading the screenshots and previews that are missing or differ from the app store.",
+    )
+    download_group.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete local screenshots, previews and their sets that the app store no longer has.",
+    )
     download_group.add_argument(
         "--version-state",
         choices=list(x.name for x in appstore.VersionState),
@@ -435,6 +462,12 @@ def run():
         help="Specify the required appstore version state.  The first matching version will be downloaded. "
         + "By default, the first version listed by the app store is used.",
     )
+    download_group.add_argument(
+        "--jobs",
+        type=arg_type_positive_int,
+        default=actions.DEFAULT_DOWNLOAD_JOBS,
+        help="The number of screenshots and previews to download concurrently.",
+    )
     add_authentication_group(download_parser)
     add_app_id_group(download_parser)
 
@@ -453,7 +486,8 @@ def run():
     publish_group.add_argument(
         "--media-completion-timeout",
         default=300,
-        help="The number of seconds to wait for media completion when attempting to update attributes on newly uploaded assets.",
+        help="The number of seconds to wait for media completion when attempting to update attributes on newly uploaded assets. "
+        + "The wait is shared by all the assets in the publish, rather than applied to each one.",
     )
     publish_group.add_argument(
         "--version-string",
@@ -480,6 +514,31 @@ def run():
         action="store_true",
         help="Prevent locales from being deleted.",
     )
+    publish_group.add_argument(
+        "--jobs",
+        type=arg_type_positive_int,
+        default=1,
+        help="The number of locales to publish concurrently.",
+    )
+    publish_group.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check every screenshot and preview set against the appstore, "
+        + "instead of skipping sets unchanged since the last successful publish.",
+    )
+    publish_plan_group = publish_group.add_mutually_exclusive_group()
+    publish_plan_group.add_argument(
+        "--plan",
+        metavar="PLAN_FILE",
+        help="Write the changes needed to publish the assets to PLAN_FILE, without making them. "
+        + f"Use {clr_keyword('--apply')} to make the changes later.",
+    )
+    publish_plan_group.add_argument(
+        "--apply",
+        metavar="PLAN_FILE",
+        help=f"Make the changes in a PLAN_FILE written by {clr_keyword('--plan')}, "
+        + "running independent changes concurrently (up to --jobs at a time).",
+    )
     add_authentication_group(publish_parser)
     add_app_id_group(publish_parser)
 
@@ -497,6 +556,9 @@ def run():
     # Set LogLevel
     logging.getLogger().setLevel(args.log_level)
 
+    # Shared connection pool
+    appstore.configure_session(pool_size=args.pool_size)
+
     # Run
     try:
         if args.action == "categories":
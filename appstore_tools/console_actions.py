@@ -3,6 +3,7 @@ import os
 import appstore_tools.appstore as appstore
 import appstore_tools.console as console
 import appstore_tools.actions as actions
+import appstore_tools.app_index as app_index
 
 
 def get_access_token(args):
@@ -17,16 +18,20 @@ def get_access_token(args):
 
 def get_app_id(args, access_token):
     if args.app_id == None:
-        args.app_id = appstore.get_app_id(
-            bundle_id=args.bundle_id, access_token=access_token
+        args.app_id = app_index.get_app_id(
+            bundle_id=args.bundle_id,
+            access_token=access_token,
+            ttl_secs=args.app_index_ttl,
         )
     return args.app_id
 
 
 def get_bundle_id(args, access_token):
     if args.bundle_id == None:
-        args.bundle_id = appstore.get_bundle_id(
-            app_id=args.app_id, access_token=access_token
+        args.bundle_id = app_index.get_bundle_id(
+            app_id=args.app_id,
+            access_token=access_token,
+            ttl_secs=args.app_index_ttl,
         )
     return args.bundle_id
 
@@ -127,14 +132,42 @@ def download(args):
         platforms=[args.platform],
         version_states=version_states,
         overwrite=args.overwrite,
+        jobs=args.jobs,
+        sync=args.sync,
+        prune=args.prune,
     )
 
 
 def publish(args):
     access_token = get_access_token(args)
+
+    if args.apply:
+        plan = actions.read_plan_file(args.apply)
+        actions.apply_plan(plan=plan, access_token=access_token, jobs=args.jobs)
+        return
+
     app_id = get_app_id(args, access_token)
     bundle_id = get_bundle_id(args, access_token)
 
+    if args.plan:
+        plan = actions.plan_publish(
+            access_token=access_token,
+            asset_dir=args.asset_dir,
+            app_id=app_id,
+            bundle_id=bundle_id,
+            platform=args.platform,
+            version_string=args.version_string or args.created_version_string,
+            update_version_string=args.version_string is not None,
+            media_completion_timeout_secs=args.media_completion_timeout,
+            asset_ignore=args.asset_ignore,
+            allow_create_version=not args.no_create_version,
+            allow_create_locale=not args.no_create_locale,
+            allow_delete_locale=not args.no_delete_locale,
+        )
+        actions.print_plan(plan)
+        actions.write_plan_file(args.plan, plan)
+        return
+
     actions.publish(
         access_token=access_token,
         asset_dir=args.asset_dir,
@@ -148,4 +181,6 @@ def publish(args):
         allow_create_version=not args.no_create_version,
         allow_create_locale=not args.no_create_locale,
         allow_delete_locale=not args.no_delete_locale,
+        jobs=args.jobs,
+        verify=args.verify,
     )
@@ -3,7 +3,12 @@ from pygments.lexers.data import JsonLexer
 from pygments.formatters.terminal import TerminalFormatter
 import json
 import colorama
-from typing import Any
+import threading
+import contextlib
+from typing import Any, Callable, Optional
+
+_output = threading.local()
+_print_lock = threading.Lock()
 
 
 def json_file(obj: Any) -> str:
@@ -27,8 +32,61 @@ def clr(*colored_text: str, sep: str = "") -> str:
 
 
 def print_clr(*colored_text: str, sep: str = ""):
-    """Add the color reset code after each colored_text."""
-    print(clr(*colored_text, sep=sep))
+    """Add the color reset code after each colored_text.
+    Inside an output group, the line is collected instead of printed."""
+    line = clr(*colored_text, sep=sep)
+    group = getattr(_output, "group", None)
+    if group is not None:
+        group.append(line)
+    else:
+        with _print_lock:
+            print(line)
+
+
+@contextlib.contextmanager
+def output_group(
+    parent: Optional[list] = None,
+):  # pylint: disable=unsubscriptable-object
+    """Collect this thread's `print_clr` lines and emit them as one block on exit,
+    so the output of concurrent tasks doesn't interleave.
+
+    The block is appended to the `parent` group if given (or the thread's current group),
+    otherwise it is printed."""
+    if parent is None:
+        parent = getattr(_output, "group", None)
+    previous = getattr(_output, "group", None)
+    group = []
+    _output.group = group
+    try:
+        yield
+    finally:
+        _output.group = previous
+        if parent is not None:
+            parent.extend(group)
+        elif group:
+            with _print_lock:
+                print("\n".join(group))
+
+
+def current_output_group() -> Optional[list]:  # pylint: disable=unsubscriptable-object
+    """Gets the output group collecting this thread's `print_clr` lines, if any."""
+    return getattr(_output, "group", None)
+
+
+def bind_output_group(func: Callable) -> Callable:
+    """Wrap the function so its `print_clr` lines join the calling thread's output group,
+    even when it runs on another thread."""
+    group = current_output_group()
+
+    def run(*args, **kwargs):
+        previous = getattr(_output, "group", None)
+        _output.group = group
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _output.group = previous
+
+    return run
 
 
 EXTRA_INFO_COLOR = colorama.Style.DIM